@@ -1,19 +1,35 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import requests
-import hashlib
-import json
 import os
+import atexit
 
 # =================================================
-# IMPORT SUMMARIZER
+# IMPORTS
 # =================================================
-from utils.ai_summarizer import summarize_text
+# Summarizer, index and graph modules pull in numpy, networkx and model
+# code; they are imported inside the cached factories below so the page
+# paints before they load.
+from utils.config import get_setting
+from utils import metrics
+from utils.cards import APP_CSS, HEADER_HTML, card_html, summary_html, similar_html
 
 # =================================================
 # SECRETS
 # =================================================
-ADS_API_KEY = st.secrets.get("NASA_ADS_API_KEY", "")
+ADS_API_KEY = get_setting("NASA_ADS_API_KEY", "")
+
+# "remote" (live ADS), "local" (harvested index) or "auto" (local, then remote)
+ADS_SOURCE = get_setting("ADS_SOURCE", "remote")
+ADS_CORPUS = get_setting("ADS_CORPUS", "ads_corpus.db")
+ADS_INDEX = get_setting("ADS_INDEX", "ads_index.npz")
+GRAPH_PATH = get_setting("KNOWLEDGE_GRAPH", "knowledge_graph.json.gz")
+# "remote" (browser-cached vis-network CDN) or "in_line" for offline deployments
+GRAPH_ASSETS = get_setting("KNOWLEDGE_GRAPH_ASSETS", "remote")
+EMBEDDING_DIR = get_setting("EMBEDDING_INDEX", "embedding_index")
+# "hashing" (no extra deps) or a sentence-transformers model name
+EMBEDDING_MODEL = get_setting("EMBEDDING_MODEL", "hashing")
 
 # =================================================
 # PAGE CONFIG
@@ -27,128 +43,164 @@ st.set_page_config(
 # =================================================
 # DEBUG
 # =================================================
-st.write("NASA ADS key loaded:", bool(ADS_API_KEY))
+# DEBUG=1 shows the metrics panel; METRICS_PORT serves /metrics for Prometheus
+DEBUG = str(get_setting("DEBUG", "")).lower() in ("1", "true", "yes")
+METRICS_PORT = get_setting("METRICS_PORT", "")
+
+
+@st.cache_resource
+def start_metrics_endpoint(port):
+    return metrics.start_metrics_server(int(port))
+
+
+if METRICS_PORT:
+    start_metrics_endpoint(METRICS_PORT)
 
 # =================================================
-# SESSION STATE & CACHE FILE
+# SUMMARY CACHE
 # =================================================
-CACHE_FILE = "summary_cache.json"
+LEGACY_CACHE_FILE = "summary_cache.json"
+SUMMARY_DB = get_setting("SUMMARY_DB", "summary_cache.db")
+
+
+@st.cache_resource
+def get_summary_store():
+    from utils.summary_store import SummaryStore
+
+    with metrics.span("summary_cache_open_seconds"):
+        store = SummaryStore(SUMMARY_DB)
+        # One-shot import of the old JSON cache (poisoned entries are dropped)
+        store.migrate_json(LEGACY_CACHE_FILE)
+    return store
+
+
+@st.cache_resource
+def get_summarizer():
+    from utils.ai_summarizer import get_backend
+
+    # hf, textrank, seq2seq or auto; see SUMMARIZER_BACKEND
+    return get_backend()
+
+
+def summary_key(abstract, summarizer):
+    from utils.summary_store import content_key
+
+    return content_key(abstract, summarizer.model, summarizer.parameters)
+
+
+def lookup_summaries(df):
+    """
+    Cached summaries for a result page, keyed by content key
+    """
+    from utils.summary_store import legacy_key
+
+    summary_store = get_summary_store()
+    summarizer = get_summarizer()
+    keys = [summary_key(a, summarizer) for a in df.abstract]
+    found = summary_store.get_many(keys, count=False)
 
-# Load cache file if exists
-if os.path.exists(CACHE_FILE):
-    with open(CACHE_FILE, "r") as f:
-        cached_summaries = json.load(f)
-else:
-    cached_summaries = {}
+    # Fall back to entries migrated from the title-keyed JSON cache
+    missing = {legacy_key(t): k for k, t in zip(keys, df.title) if k not in found}
+    for old_key, summary in summary_store.get_many(missing, count=False).items():
+        found[missing[old_key]] = summary
+
+    # Count each card once, after the fallback
+    metrics.inc("summary_cache_hits_total", len(found))
+    metrics.inc("summary_cache_misses_total", len(set(keys)) - len(found))
+    return keys, found
 
-if "summaries" not in st.session_state:
-    st.session_state.summaries = cached_summaries
 
 # =================================================
 # BLACK UI
 # =================================================
-st.markdown("""
-<style>
-body, [data-testid="stAppViewContainer"] {
-    background-color:#000;
-    color:#fff;
-}
-input, textarea {
-    background:#2C2F36;
-    color:white;
-}
-.stButton>button {
-    background:#3A3F47;
-    color:white;
-    border-radius:8px;
-}
-.stButton>button:hover {
-    background:#6BE6C1;
-    color:black;
-}
-.result-card {
-    background:#1A1A1A;
-    padding:15px;
-    border-radius:10px;
-    border-left:4px solid #6BE6C1;
-    margin-bottom:10px;
-}
-.summary-box {
-    background:#222222;
-    padding:12px;
-    border-radius:8px;
-    border-left:4px solid #6BE6C1;
-    margin-bottom:20px;
-    white-space: pre-line;
-}
-.link-button {
-    background:#6BE6C1;
-    color:black;
-    padding:4px 8px;
-    border-radius:6px;
-    text-decoration:none;
-    font-weight:600;
-}
-</style>
-""", unsafe_allow_html=True)
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # =================================================
 # TITLE
 # =================================================
-st.markdown("""
-<div style='text-align: center;'>
-    <h1>🧬 BioOrbit</h1>
-    <p style='color: #aaa;'>Explore NASA Space Biology Research</p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 # =================================================
 # STOP IF KEYS MISSING
 # =================================================
-if not ADS_API_KEY:
+if not ADS_API_KEY and ADS_SOURCE != "local":
     st.error("❌ NASA ADS API key missing in Streamlit Secrets.")
     st.stop()
 
 # =================================================
 # NASA ADS FETCH
 # =================================================
-@st.cache_data(ttl=3600)
-def fetch_ads(query, rows, start):
-    url = "https://api.adsabs.harvard.edu/v1/search/query"
-    headers = {"Authorization": f"Bearer {ADS_API_KEY}"}
+@st.cache_resource
+def get_local_search():
+    if not os.path.exists(ADS_CORPUS):
+        return None
+    from utils.ads_index import LocalSearch
+
+    return LocalSearch(ADS_CORPUS, ADS_INDEX)
+
+
+@st.cache_resource
+def get_embedding_index():
+    from utils.embedding_index import load_index
+
+    # (index, embedder); grows as results are viewed
+    return load_index(EMBEDDING_DIR, EMBEDDING_MODEL)
+
+
+@st.cache_resource(max_entries=32, ttl=3600)
+def get_cursor(source, query, semantic=False):
+    """
+    One shared, lazily paginated cursor per query; None if unavailable
+    """
+    from utils.ads_cursor import ResultCursor, local_fetcher, remote_fetcher, hybrid_fetcher
+
+    if semantic:
+        embedding_index, embedder = get_embedding_index()
+        return ResultCursor(hybrid_fetcher(get_local_search(), embedding_index, embedder, query))
 
-    # Prepare query to search only in title and abstract
-    # Multi-word queries are handled by wrapping in quotes
-    clean_query = ' '.join(query.split())  # remove extra spaces
-    query_str = f'title:"{clean_query}" OR abstract:"{clean_query}"'
+    if source in ("local", "auto"):
+        local = get_local_search()
+        if local is not None:
+            fetch = local_fetcher(local, query)
+            if source == "local" or fetch(0, 1)[1]:
+                return ResultCursor(fetch)
+        if source == "local":
+            return None
+    return ResultCursor(remote_fetcher(ADS_API_KEY, query))
 
-    params = {
-        "q": query_str,
-        "fl": "title,abstract,author,year,doi",
-        "rows": rows,
-        "start": start
-    }
+
+@st.cache_resource
+def get_knowledge_graph():
+    from utils.knowledge_graph import KnowledgeGraph
+
+    # Shared by all sessions; grows as results are viewed
+    graph = KnowledgeGraph.load(GRAPH_PATH)
+    # Autosave only runs from add_records; write the tail on shutdown
+    atexit.register(graph.flush)
+    return graph
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_graph(_graph, graph_id, version, center, hops):
+    """
+    pyvis HTML for a neighborhood; recomputed only when the graph grows
+    """
+    return _graph.render_html(center, k=hops, cdn_resources=GRAPH_ASSETS)
+
+
+def fetch_ads(query, rows, start, semantic=False):
+    from utils.ads_cursor import docs_to_frame
+
+    cursor = get_cursor(ADS_SOURCE, query, semantic)
+    if cursor is None:
+        return pd.DataFrame(), 0, f"Local ADS corpus not found: {ADS_CORPUS}"
 
     try:
-        r = requests.get(url, headers=headers, params=params, timeout=20)
-        r.raise_for_status()
+        docs = cursor.window(start, rows)
     except requests.RequestException as e:
         return pd.DataFrame(), 0, str(e)
 
-    data = r.json().get("response", {})
-    total = data.get("numFound", 0)
-
-    rows_data = []
-    for d in data.get("docs", []):
-        rows_data.append({
-            "title": d.get("title", [""])[0],
-            "abstract": d.get("abstract", ""),
-            "year": d.get("year", ""),
-            "authors": ", ".join(d.get("author", [])[:3]),
-            "link": f"https://ui.adsabs.harvard.edu/abs/{d.get('doi',[None])[0]}" if d.get("doi") else ""
-        })
-
-    return pd.DataFrame(rows_data), total, ""
+    return docs_to_frame(docs), cursor.total or 0, ""
 
 # =================================================
 # SEARCH UI
@@ -158,55 +210,172 @@ rows = st.slider("Results per page", 5, 30, 10)
 page = st.number_input("Page", min_value=1, step=1)
 start = (page - 1) * rows
 
+# Hybrid keyword + embedding ranking needs the harvested corpus
+semantic = False
+if get_local_search() is not None and len(get_embedding_index()[0]):
+    semantic = st.checkbox("🧠 Semantic search (keyword + embedding)", key="semantic")
+
 # =================================================
 # RESULTS
 # =================================================
+# st.fragment reruns only the decorated function on a widget click
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda fn: fn)
+
+
+def render_similar(bibcode, k=5):
+    embedding_index, _ = get_embedding_index()
+    ids, scores = embedding_index.similar(bibcode, k)
+    if not ids:
+        st.caption("No similar papers indexed yet.")
+        return
+
+    items = [(doc_id, embedding_index.title(doc_id), score) for doc_id, score in zip(ids, scores)]
+    st.markdown(similar_html(items), unsafe_allow_html=True)
+
+
+@fragment
+def render_card_actions(i, article_id, abstract, bibcode, summary, show_all):
+    """
+    Summary and similar-paper buttons for one card; a click reruns only this card
+    """
+    clicked = st.button(f"✨ Summarize {i+1}", key=f"s{i}")
+    if clicked and summary is None:
+        summary_store, summarizer = get_summary_store(), get_summarizer()
+        # Another session may have summarized it since the page was built
+        summary = summary_store.get(article_id, count=False)
+        if summary is None:
+            with st.spinner("🤖 Generating summary..."):
+                summary = summarizer.summarize(abstract)
+
+                # Save to cache (errors and refusals are not stored)
+                summary_store.put(article_id, summary, model=summarizer.model)
+
+    if summary is not None and (clicked or show_all):
+        st.markdown(summary_html(summary), unsafe_allow_html=True)
+
+    if bibcode and st.button("🔭 Similar papers", key=f"sim{i}"):
+        render_similar(bibcode)
+
+
+@metrics.timed("render_cards_seconds")
+def render_cards(df, offset, show_all):
+    article_ids, summaries = lookup_summaries(df)
+
+    for i, row in enumerate(df.itertuples(index=False), start=offset):
+        article_id = article_ids[i - offset]
+
+        # Paper card; HTML is escaped and memoized in utils.cards
+        st.markdown(card_html(row.title, row.authors, row.year, row.link), unsafe_allow_html=True)
+        render_card_actions(i, article_id, row.abstract, row.bibcode, summaries.get(article_id), show_all)
+
+        st.markdown("<br>", unsafe_allow_html=True)
+
+
 if query:
-    with st.spinner("🔎 Searching NASA ADS..."):
-        df, total, error = fetch_ads(query, rows, start)
+    from utils.ads_cursor import docs_to_frame
+    from utils.embedding_index import doc_text
+    from utils.knowledge_graph import KnowledgeGraph
+
+    cursor = get_cursor(ADS_SOURCE, query, semantic)
+    error = "" if cursor else f"Local ADS corpus not found: {ADS_CORPUS}"
+
+    if cursor:
+        try:
+            # Only the chunk holding this page; later chunks stream in below
+            with st.spinner("🔎 Searching NASA ADS..."):
+                cursor.chunk(start // cursor.chunk_size)
+        except requests.RequestException as e:
+            error = str(e)
 
     if error:
         st.error("NASA ADS error")
         st.code(error)
         st.stop()
 
-    st.success(f"📊 Total papers found: {total}")
+    st.success(f"📊 Total papers found: {cursor.total}")
     st.caption(f"Page {page} • {rows} results")
 
-    for i, row in df.iterrows():
-        article_id = hashlib.md5(row.title.encode()).hexdigest()
-
-        # Paper card
-        st.markdown(f"""
-        <div class="result-card">
-            <h4>{row.title}</h4>
-            <p style="color:#aaa;"><b>Authors:</b> {row.authors}  <b>Year:</b> {row.year}</p>
-            {"<a class='link-button' target='_blank' href='"+row.link+"'>🔗 View</a>" if row.link else ""}
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Summary button + summary box
-        if st.button(f"✨ Summarize {i+1}", key=f"s{i}"):
-            if article_id not in st.session_state.summaries:
-                with st.spinner("🤖 Generating summary..."):
-                    summary_text = summarize_text(row.abstract)
-                    # Convert to 4-bullet summary
-                    bullets = summary_text.split(". ")
-                    bullets = [f"• {b.strip()}" for b in bullets if b][:4]
-                    st.session_state.summaries[article_id] = "<br>".join(bullets)
-
-                    # Save to cache file
-                    with open(CACHE_FILE, "w") as f:
-                        json.dump(st.session_state.summaries, f)
-
-            st.markdown(f"""
-            <div class="summary-box">
-                <h5> AI Summary</h5>
-                <p>{st.session_state.summaries[article_id]}</p>
-            </div>
-            """, unsafe_allow_html=True)
+    # Summarize every uncached abstract on this page in one batched call
+    if st.button("✨ Summarize all on this page", key="summarize_all"):
+        df, _, _ = fetch_ads(query, rows, start, semantic)
+        article_ids, summaries = lookup_summaries(df) if not df.empty else ([], {})
+        missing = [
+            (article_id, abstract)
+            for article_id, abstract in zip(article_ids, df.abstract)
+            if article_id not in summaries
+        ]
+        if missing:
+            summary_store, summarizer = get_summary_store(), get_summarizer()
+            with st.spinner(f"🤖 Generating {len(missing)} summaries..."):
+                results = summarizer.summarize_many([abstract for _, abstract in missing])
 
-        st.markdown("<br>", unsafe_allow_html=True)
+            failed = 0
+            for (article_id, _), summary_text in zip(missing, results):
+                if not summary_store.put(article_id, summary_text, model=summarizer.model):
+                    failed += 1
+
+            if failed:
+                st.warning(f"{failed} of {len(missing)} summaries failed.")
+        st.session_state.show_all_summaries = query
+
+    show_all = st.session_state.get("show_all_summaries") == query
+
+    # Render each chunk's cards as soon as it is available
+    page_docs = []
+    embedding_index, embedder = get_embedding_index()
+    try:
+        for offset, docs in cursor.iter_window(start, rows):
+            df = docs_to_frame(docs)
+            # Index new abstracts so "similar papers" covers everything seen
+            embedding_index.add_texts(
+                embedder, list(df.bibcode), list(df.title),
+                [doc_text(t, a) for t, a in zip(df.title, df.abstract)]
+            )
+            render_cards(df, offset - start, show_all)
+            page_docs.extend(docs)
+    except requests.RequestException as e:
+        st.error("NASA ADS error")
+        st.code(str(e))
+
+    # =================================================
+    # KNOWLEDGE GRAPH
+    # =================================================
+    knowledge_graph = get_knowledge_graph()
+    knowledge_graph.add_records(page_docs)
+
+    with st.expander("🕸️ Knowledge graph"):
+        papers = {
+            (d.get("title") or [""])[0]: KnowledgeGraph.paper_id(d["bibcode"])
+            for d in page_docs if d.get("bibcode")
+        }
+        if papers:
+            center = st.selectbox("Center on paper", list(papers), key="kg_center")
+            hops = st.slider("Hops", 1, 3, 2, key="kg_hops")
+            graph_html = render_graph(
+                knowledge_graph, id(knowledge_graph), knowledge_graph.version, papers[center], hops
+            )
+            # st.iframe replaces components.html in newer Streamlit releases
+            if hasattr(st, "iframe"):
+                st.iframe(graph_html, height=620)
+            else:
+                components.html(graph_html, height=620)
+        else:
+            st.caption("No papers on this page to graph.")
+
+# =================================================
+# DEBUG PANEL
+# =================================================
+if DEBUG:
+    with st.sidebar.expander("🛠️ Debug", expanded=True):
+        st.write("NASA ADS key loaded:", bool(ADS_API_KEY))
+        st.write("Summarizer:", get_summarizer().model)
+        st.metric("Summary cache hit ratio", f"{metrics.cache_hit_ratio():.0%}")
+        st.dataframe(pd.DataFrame(metrics.REGISTRY.snapshot()), hide_index=True)
+        st.download_button(
+            "Download Prometheus metrics",
+            metrics.render_prometheus(),
+            file_name="bioorbit_metrics.prom"
+        )
 
 st.markdown("---")
 st.caption("Powered by NASA ADS + HuggingFace 🤗 + Ayesha Zafar")
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.stubs import ads_stub, hf_stub, fake_doc
+
+# =================================================
+# HARNESS
+# =================================================
+def measure(fn, rounds, warmup=1):
+    """
+    Run fn() `rounds` times; returns latency stats in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return {
+        "rounds": rounds,
+        "mean_ms": statistics.fmean(times),
+        "p50_ms": times[len(times) // 2],
+        "p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))],
+        "ops_per_s": 1000 * rounds / sum(times),
+    }
+
+
+# =================================================
+# BENCHMARKS
+# =================================================
+def bench_search_remote(ads, rounds):
+    from utils.ads_cursor import remote_fetcher
+
+    fetch = remote_fetcher("stub-key", "microgravity", url=ads.url)
+    return measure(lambda: fetch(0, 30), rounds)
+
+
+def bench_pagination(ads, rounds):
+    """
+    Flip through pages and resize them on one cursor, as a user would
+    """
+    from utils.ads_cursor import ResultCursor, remote_fetcher
+
+    windows = [(page * rows, rows) for rows in (10, 30, 5) for page in range(12)]
+
+    def flip():
+        cursor = ResultCursor(remote_fetcher("stub-key", "radiation", url=ads.url))
+        for start, rows in windows:
+            cursor.window(start, rows)
+        cursor.close()
+
+    before = ads.stats["requests"]
+    result = measure(flip, rounds)
+    result["ads_calls_per_session"] = (ads.stats["requests"] - before) / (rounds + 1)
+    result["windows_per_session"] = len(windows)
+    return result
+
+
+def bench_search_local(rounds, n_docs):
+    from utils.ads_index import BM25Index
+
+    index = BM25Index.build(fake_doc(n) for n in range(n_docs))
+    queries = ["microgravity", "bone loss", "plant root gravitropism", "stem cell"]
+    state = {"i": 0}
+
+    def search():
+        state["i"] += 1
+        index.search(queries[state["i"] % len(queries)], 30, 0)
+
+    result = measure(search, rounds)
+    result["docs"] = n_docs
+    return result
+
+
+def bench_cache_lookup(rounds, n_entries, workdir):
+    from utils.summary_store import SummaryStore, content_key
+
+    store = SummaryStore(os.path.join(workdir, "bench_cache.db"), max_entries=None)
+    keys = [content_key(f"abstract {n}", "bench", {}) for n in range(n_entries)]
+    conn = store._conn()
+    conn.execute("BEGIN")
+    for key in keys:
+        store.put(key, f"Summary for {key}.", model="bench")
+    conn.execute("COMMIT")
+
+    state = {"i": 0}
+
+    def lookup():
+        # One results page: 20 hits, 10 misses
+        state["i"] = (state["i"] + 20) % (n_entries - 20)
+        page = keys[state["i"]:state["i"] + 20] + [f"missing-{state['i']}-{j}" for j in range(10)]
+        store.get_many(page)
+
+    result = measure(lookup, rounds)
+    result["entries"] = n_entries
+    return result
+
+
+def bench_batch_summarize(hf, rounds):
+    from utils import ai_summarizer
+
+    ai_summarizer.HF_BACKOFF_BASE = 0.01
+    abstracts = [fake_doc(n)["abstract"] for n in range(30)]
+
+    before = hf.stats["requests"]
+    result = measure(lambda: ai_summarizer.summarize_many(abstracts), rounds)
+    result["abstracts_per_call"] = len(abstracts)
+    result["abstracts_per_s"] = result["ops_per_s"] * len(abstracts)
+    result["hf_requests_per_call"] = (hf.stats["requests"] - before) / (rounds + 1)
+    return result
+
+
+# =================================================
+# REPORTING
+# =================================================
+def print_table(results):
+    print(f"{'benchmark':<18}{'rounds':>8}{'ops/s':>10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['rounds']:>8}{r['ops_per_s']:>10.1f}{r['mean_ms']:>10.2f}"
+              f"{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+        extra = {k: v for k, v in r.items() if k not in ("rounds", "ops_per_s", "mean_ms", "p50_ms", "p99_ms")}
+        if extra:
+            print(" " * 18 + ", ".join(f"{k}={v:g}" for k, v in extra.items()))
+
+
+def compare(results, baseline, max_regression):
+    """
+    Names of benchmarks whose p50 got worse than baseline by more than max_regression
+    """
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and r["p50_ms"] > base["p50_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{name}: p50 {base['p50_ms']:.2f} -> {r['p50_ms']:.2f} ms "
+                f"(+{100 * (r['p50_ms'] / base['p50_ms'] - 1):.0f}%)"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark search, pagination, cache and summarization offline")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--quick", action="store_true", help="fewer rounds and a smaller corpus")
+    parser.add_argument("--only", action="append", help="run only these benchmarks (repeatable)")
+    parser.add_argument("--ads-latency", type=float, default=20, help="stub ADS latency in ms")
+    parser.add_argument("--hf-latency", type=float, default=50, help="stub HF latency in ms")
+    parser.add_argument("--save", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p50 slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    rounds = 10 if args.quick else args.rounds
+    n_docs = 2_000 if args.quick else 20_000
+    n_entries = 2_000 if args.quick else 20_000
+    wanted = set(args.only or ["search_remote", "pagination", "search_local", "cache_lookup", "batch_summarize"])
+
+    results = {}
+    with ads_stub(latency=args.ads_latency / 1000) as ads, hf_stub(latency=args.hf_latency / 1000) as hf, \
+            tempfile.TemporaryDirectory() as workdir:
+        # Point the summarizer at the stub before it is imported
+        os.environ["HF_API_URL"] = hf.url
+        os.environ["HF_API_KEY"] = "stub-key"
+
+        if "search_remote" in wanted:
+            results["search_remote"] = bench_search_remote(ads, rounds)
+        if "pagination" in wanted:
+            results["pagination"] = bench_pagination(ads, max(3, rounds // 5))
+        if "search_local" in wanted:
+            results["search_local"] = bench_search_local(rounds * 4, n_docs)
+        if "cache_lookup" in wanted:
+            results["cache_lookup"] = bench_cache_lookup(rounds * 4, n_entries, workdir)
+        if "batch_summarize" in wanted:
+            results["batch_summarize"] = bench_batch_summarize(hf, max(3, rounds // 5))
+
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
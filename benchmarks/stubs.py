@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = (
+    "microgravity radiation plant root bone muscle stem cell gene expression spaceflight "
+    "mice arabidopsis oxidative stress immune response gravitropism signaling osteoclast"
+).split()
+
+
+def fake_doc(n):
+    """
+    Deterministic ADS-shaped record number n
+    """
+    words = [WORDS[(n * 7 + i * 3) % len(WORDS)] for i in range(60)]
+    return {
+        "bibcode": f"2020Stub..{n:06d}",
+        "title": [f"Effects of {WORDS[n % len(WORDS)]} on {WORDS[(n + 5) % len(WORDS)]} {n}"],
+        "abstract": ". ".join(" ".join(words[i:i + 12]).capitalize() for i in range(0, 60, 12)) + ".",
+        "author": [f"Author, {chr(65 + (n + i) % 26)}." for i in range(4)],
+        "year": str(2000 + n % 25),
+        "doi": [f"10.0000/stub.{n}"],
+        "entdate": "2020-01-01",
+    }
+
+
+class _StubServer:
+    def __init__(self, handler):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def ads_stub(num_found=5000, latency=0.02):
+    """
+    Local ADS search endpoint: any query matches num_found fake records
+    """
+    stats = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            stats["requests"] += 1
+            params = parse_qs(urlparse(self.path).query)
+            start = int(params.get("start", ["0"])[0])
+            rows = int(params.get("rows", ["10"])[0])
+            time.sleep(latency)
+
+            docs = [fake_doc(n) for n in range(start, min(start + rows, num_found))]
+            body = json.dumps({"response": {"numFound": num_found, "start": start, "docs": docs}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = _StubServer(Handler)
+    server.stats = stats
+    return server
+
+
+def hf_stub(latency=0.05, per_input=0.005, loading_every=10):
+    """
+    Local HF inference endpoint. Every `loading_every`-th request answers
+    503 "model loading" so the retry path is exercised.
+    """
+    stats = {"requests": 0, "inputs": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            inputs = payload["inputs"]
+            with lock:
+                stats["requests"] += 1
+                loading = loading_every and stats["requests"] % loading_every == 0
+
+            if loading:
+                status, out = 503, {"error": "Model is currently loading", "estimated_time": 0.01}
+            else:
+                batch = inputs if isinstance(inputs, list) else [inputs]
+                with lock:
+                    stats["inputs"] += len(batch)
+                time.sleep(latency + per_input * len(batch))
+                status, out = 200, [{"summary_text": text[:200]} for text in batch]
+
+            body = json.dumps(out).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = _StubServer(Handler)
+    server.stats = stats
+    return server
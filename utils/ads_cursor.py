@@ -0,0 +1,202 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import metrics
+from utils.ads_index import ADS_API_URL, ADS_FIELDS, phrase_query
+from utils.embedding_index import hybrid_search
+
+# =================================================
+# SETTINGS
+# =================================================
+# ADS allows up to 2000 rows per request; 100 covers several UI pages
+CHUNK_SIZE = 100
+ADS_TIMEOUT = 20
+
+FRAME_COLUMNS = ["bibcode", "title", "abstract", "year", "authors", "link"]
+
+
+def docs_to_frame(docs):
+    """
+    Build the results DataFrame column by column straight from the raw docs;
+    same values as doc_to_row, without a dict per row
+    """
+    return pd.DataFrame({
+        "bibcode": [d.get("bibcode", "") for d in docs],
+        "title": [(d.get("title") or [""])[0] for d in docs],
+        "abstract": [d.get("abstract", "") for d in docs],
+        "year": [d.get("year", "") for d in docs],
+        "authors": [", ".join(d.get("author", [])[:3]) for d in docs],
+        "link": [f"https://ui.adsabs.harvard.edu/abs/{d['doi'][0]}" if d.get("doi") else "" for d in docs],
+    }, columns=FRAME_COLUMNS)
+
+
+# =================================================
+# CHUNK FETCHERS
+# =================================================
+def remote_fetcher(api_key, query, session=None, url=ADS_API_URL):
+    """
+    fetch(start, rows) -> (docs, total) against the live ADS API
+    """
+    if session is None:
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_maxsize=2))
+    headers = {"Authorization": f"Bearer {api_key}"}
+    q = phrase_query(query)
+
+    def fetch(start, rows):
+        params = {"q": q, "fl": ADS_FIELDS, "rows": rows, "start": start}
+        metrics.inc("ads_requests_total", source="remote")
+        try:
+            with metrics.span("ads_seconds", source="remote"):
+                r = session.get(url, headers=headers, params=params, timeout=ADS_TIMEOUT)
+                r.raise_for_status()
+        except requests.RequestException:
+            metrics.inc("ads_errors_total", source="remote")
+            raise
+        metrics.inc("ads_bytes_total", len(r.content), source="remote")
+        data = r.json().get("response", {})
+        return data.get("docs", []), data.get("numFound", 0)
+
+    return fetch
+
+
+def local_fetcher(local_search, query):
+    """
+    fetch(start, rows) -> (docs, total) against a LocalSearch index
+    """
+    def fetch(start, rows):
+        metrics.inc("ads_requests_total", source="local")
+        with metrics.span("ads_seconds", source="local"):
+            return local_search.search(query, rows, start)
+
+    return fetch
+
+
+def hybrid_fetcher(local_search, embedding_index, embedder, query):
+    """
+    fetch(start, rows) -> (docs, total) ranked by merged BM25 + embedding scores
+    """
+    ranked = []
+
+    def fetch(start, rows):
+        metrics.inc("ads_requests_total", source="hybrid")
+        if not ranked:
+            bibcodes = hybrid_search(local_search.index, embedding_index, embedder, query)
+            # Vector hits can come from papers seen live but never harvested
+            ranked.extend(local_search.store.get_many(bibcodes))
+        return ranked[start:start + rows], len(ranked)
+
+    return fetch
+
+
+# =================================================
+# CURSOR
+# =================================================
+class ResultCursor:
+    """
+    Lazily paginated view over one query's results.
+
+    Results are downloaded in fixed CHUNK_SIZE chunks and kept, so any
+    (page, rows) window is a slice of chunks already fetched. After a chunk
+    arrives the next one is prefetched in the background.
+    """
+
+    def __init__(self, fetch, chunk_size=CHUNK_SIZE):
+        self.fetch = fetch
+        self.chunk_size = chunk_size
+        self.total = None
+        self._chunks = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2)
+
+    def _fetch_chunk(self, idx):
+        docs, total = self.fetch(idx * self.chunk_size, self.chunk_size)
+        with self._lock:
+            self._chunks[idx] = docs
+            self.total = total
+        return docs
+
+    def _submit(self, idx):
+        # Caller holds the lock
+        if idx in self._chunks or idx in self._pending:
+            return
+        if self.total is not None and idx * self.chunk_size >= self.total:
+            return
+        self._pending[idx] = self._pool.submit(self._fetch_chunk, idx)
+
+    def chunk(self, idx):
+        """
+        Docs of chunk idx, fetching (or waiting for a prefetch) if needed.
+        Only errors from a fetch made for this call are raised; a failed
+        background prefetch is refetched.
+        """
+        retried = False
+        while True:
+            with self._lock:
+                if idx in self._chunks:
+                    docs = self._chunks[idx]
+                    self._submit(idx + 1)
+                    return docs
+                future = self._pending.get(idx)
+                if future is not None and future.done() and future.exception() is not None:
+                    del self._pending[idx]
+                    future = None
+                prefetched = future is not None and not retried
+                if future is None:
+                    self._submit(idx)
+                    future = self._pending.get(idx)
+
+            if future is None:
+                return []
+            try:
+                docs = future.result()
+            except Exception:
+                # Failed fetches are retried on the next call
+                with self._lock:
+                    if self._pending.get(idx) is future:
+                        del self._pending[idx]
+                if prefetched:
+                    retried = True
+                    continue
+                raise
+
+            with self._lock:
+                if self._pending.get(idx) is future:
+                    del self._pending[idx]
+                self._submit(idx + 1)
+            return docs
+
+    def iter_window(self, start, rows):
+        """
+        Yield (offset, docs) slices of [start, start + rows) as chunks arrive
+        """
+        metrics.inc("cursor_windows_total")
+        end = start + rows
+        idx = start // self.chunk_size
+        while idx * self.chunk_size < end:
+            base = idx * self.chunk_size
+            docs = self.chunk(idx)
+            lo = max(start, base) - base
+            hi = min(end, base + self.chunk_size) - base
+            if docs[lo:hi]:
+                yield base + lo, docs[lo:hi]
+            if len(docs) < self.chunk_size:
+                break
+            idx += 1
+
+    def window(self, start, rows):
+        """
+        All docs in [start, start + rows)
+        """
+        docs = []
+        for _, part in self.iter_window(start, rows):
+            docs.extend(part)
+        return docs
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,498 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import date
+
+import numpy as np
+import requests
+
+from utils.config import get_setting
+
+# =================================================
+# SETTINGS
+# =================================================
+ADS_API_URL = get_setting("ADS_API_URL", "https://api.adsabs.harvard.edu/v1/search/query")
+ADS_FIELDS = "bibcode,title,abstract,author,year,doi,entdate"
+
+SEED_TOPICS = [
+    "microgravity",
+    "radiation",
+    "plants",
+    "spaceflight",
+    "stem cells",
+    "bone loss",
+    "muscle atrophy",
+    "gravitropism",
+    "space biology",
+    "astrobiology",
+]
+
+DEFAULT_CORPUS_PATH = "ads_corpus.db"
+DEFAULT_INDEX_PATH = "ads_index.npz"
+
+HARVEST_PAGE_SIZE = 200
+HARVEST_TIMEOUT = 20
+HARVEST_MAX_RETRIES = 5
+
+# BM25 parameters; title terms count TITLE_WEIGHT times
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "was", "were", "with",
+}
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# =================================================
+# ADS QUERIES & RECORDS
+# =================================================
+def phrase_query(query):
+    """
+    Search only in title and abstract.
+    Multi-word queries are handled by wrapping in quotes.
+    """
+    clean_query = " ".join(query.split())  # remove extra spaces
+    return f'title:"{clean_query}" OR abstract:"{clean_query}"'
+
+
+def doc_to_row(d):
+    """
+    Flatten an ADS doc into the row shape app.py renders
+    """
+    return {
+        "bibcode": d.get("bibcode", ""),
+        "title": (d.get("title") or [""])[0],
+        "abstract": d.get("abstract", ""),
+        "year": d.get("year", ""),
+        "authors": ", ".join(d.get("author", [])[:3]),
+        "link": f"https://ui.adsabs.harvard.edu/abs/{d.get('doi',[None])[0]}" if d.get("doi") else ""
+    }
+
+
+def tokenize(text):
+    tokens = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        if tok in STOPWORDS:
+            continue
+        # Cheap plural folding: plants -> plant, cells -> cell
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+# =================================================
+# RECORDED FIXTURES
+# =================================================
+def _fixture_key(params):
+    return f"{params.get('q')}|{params.get('start', 0)}|{params.get('rows')}"
+
+
+class _RecordedResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+        self.headers = {}
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} recorded error", response=self)
+
+
+class RecordedSession:
+    """
+    Drop-in for requests.Session that replays ADS responses from a fixture file.
+    Unknown requests get an empty result set.
+    """
+
+    def __init__(self, fixture_path):
+        with open(fixture_path, "r") as f:
+            self.responses = json.load(f)
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        params = params or {}
+        self.calls.append(params)
+        body = self.responses.get(_fixture_key(params))
+        if body is None:
+            body = {"response": {"numFound": 0, "docs": []}}
+        return _RecordedResponse(200, body)
+
+
+class RecordingSession:
+    """
+    Wraps a real session and records every ADS response to a fixture file
+    """
+
+    def __init__(self, fixture_path, session=None):
+        self.fixture_path = fixture_path
+        self.session = session or requests.Session()
+        self.responses = {}
+
+    def get(self, url, params=None, **kwargs):
+        r = self.session.get(url, params=params, **kwargs)
+        if r.status_code == 200:
+            self.responses[_fixture_key(params or {})] = r.json()
+            with open(self.fixture_path, "w") as f:
+                json.dump(self.responses, f, indent=1)
+        return r
+
+
+# =================================================
+# CORPUS STORE
+# =================================================
+class CorpusStore:
+    """
+    SQLite store of raw ADS docs keyed by bibcode
+    """
+
+    def __init__(self, path=DEFAULT_CORPUS_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS docs (
+                bibcode TEXT PRIMARY KEY,
+                doc TEXT NOT NULL,
+                year TEXT,
+                entdate TEXT
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def upsert(self, docs):
+        rows = [
+            (d["bibcode"], json.dumps(d), str(d.get("year", "")), d.get("entdate", ""))
+            for d in docs if d.get("bibcode")
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO docs (bibcode, doc, year, entdate) VALUES (?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def get_many(self, bibcodes):
+        """
+        Docs for bibcodes, in the order given
+        """
+        if not bibcodes:
+            return []
+        marks = ",".join("?" * len(bibcodes))
+        found = {
+            b: json.loads(doc) for b, doc in self.conn.execute(
+                f"SELECT bibcode, doc FROM docs WHERE bibcode IN ({marks})", list(bibcodes)
+            )
+        }
+        return [found[b] for b in bibcodes if b in found]
+
+    def iter_docs(self):
+        for (doc,) in self.conn.execute("SELECT doc FROM docs ORDER BY bibcode"):
+            yield json.loads(doc)
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def get_meta(self, name, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, name, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+
+# =================================================
+# HARVESTER
+# =================================================
+def _get_with_retry(session, params, headers):
+    for attempt in range(HARVEST_MAX_RETRIES + 1):
+        r = session.get(ADS_API_URL, headers=headers, params=params, timeout=HARVEST_TIMEOUT)
+        if r.status_code == 429 and attempt < HARVEST_MAX_RETRIES:
+            # ADS sends the epoch second the quota resets
+            reset = r.headers.get("X-RateLimit-Reset")
+            wait = float(reset) - time.time() if reset else 2 ** attempt
+            time.sleep(min(max(wait, 1), 60))
+            continue
+        r.raise_for_status()
+        return r.json().get("response", {})
+    raise requests.HTTPError("ADS rate limit: retries exhausted")
+
+
+def iter_topic_pages(topic, api_key="", session=None, since_year=None, since_date=None,
+                     page_size=HARVEST_PAGE_SIZE, max_records=None):
+    """
+    Yield pages (lists of raw docs) of all ADS results for a topic.
+    since_year / since_date restrict to newer records for incremental runs.
+    """
+    session = session or requests.Session()
+    headers = {"Authorization": f"Bearer {api_key}"}
+
+    q = f"({phrase_query(topic)})"
+    if since_year:
+        q += f" AND year:[{since_year} TO *]"
+    if since_date:
+        q += f' AND entdate:["{since_date}" TO *]'
+
+    start = 0
+    while True:
+        params = {"q": q, "fl": ADS_FIELDS, "rows": page_size, "start": start, "sort": "bibcode asc"}
+        data = _get_with_retry(session, params, headers)
+        docs = data.get("docs", [])
+        if not docs:
+            break
+
+        yield docs
+        start += len(docs)
+        if start >= data.get("numFound", 0) or (max_records and start >= max_records):
+            break
+
+
+def harvest_topic(store, topic, **kwargs):
+    """
+    Page through all ADS results for a topic into the corpus store.
+    Returns the number of docs stored.
+    """
+    return sum(store.upsert(docs) for docs in iter_topic_pages(topic, **kwargs))
+
+
+def harvest(store, topics=SEED_TOPICS, api_key="", session=None, since_year=None,
+            incremental=False, **kwargs):
+    """
+    Harvest every topic. With incremental=True each topic only fetches records
+    entered since its last successful harvest.
+    """
+    counts = {}
+    for topic in topics:
+        since_date = store.get_meta(f"harvested:{topic}") if incremental else None
+        today = date.today().isoformat()
+        counts[topic] = harvest_topic(
+            store, topic, api_key=api_key, session=session,
+            since_year=since_year, since_date=since_date, **kwargs
+        )
+        store.set_meta(f"harvested:{topic}", today)
+    return counts
+
+
+# =================================================
+# BM25 INDEX
+# =================================================
+class BM25Index:
+    """
+    Inverted index over title + abstract with precomputed BM25 impacts.
+    Postings are numpy arrays, so a query is a few vectorized adds.
+    """
+
+    def __init__(self, bibcodes, vocab, offsets, doc_ids, impacts):
+        self.bibcodes = bibcodes
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+
+    @classmethod
+    def build(cls, docs, k1=BM25_K1, b=BM25_B):
+        bibcodes, term_freqs, lengths = [], [], []
+        for d in docs:
+            title = (d.get("title") or [""])[0]
+            tokens = tokenize(title) * TITLE_WEIGHT + tokenize(d.get("abstract", ""))
+            tf = {}
+            for tok in tokens:
+                tf[tok] = tf.get(tok, 0) + 1
+            bibcodes.append(d["bibcode"])
+            term_freqs.append(tf)
+            lengths.append(len(tokens))
+
+        n_docs = len(bibcodes)
+        avgdl = (sum(lengths) / n_docs) if n_docs else 1.0
+
+        postings = {}
+        for doc_id, tf in enumerate(term_freqs):
+            norm = k1 * (1 - b + b * lengths[doc_id] / avgdl)
+            for term, freq in tf.items():
+                postings.setdefault(term, []).append((doc_id, freq * (k1 + 1) / (freq + norm)))
+
+        vocab = {}
+        offsets = [0]
+        doc_ids, impacts = [], []
+        for term in sorted(postings):
+            plist = postings[term]
+            idf = np.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            vocab[term] = len(vocab)
+            doc_ids.extend(p[0] for p in plist)
+            impacts.extend(idf * p[1] for p in plist)
+            offsets.append(len(doc_ids))
+
+        return cls(
+            bibcodes,
+            vocab,
+            np.asarray(offsets, dtype=np.int64),
+            np.asarray(doc_ids, dtype=np.int32),
+            np.asarray(impacts, dtype=np.float32),
+        )
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        terms = sorted(self.vocab, key=self.vocab.get)
+        np.savez(
+            path,
+            bibcodes=np.asarray(self.bibcodes, dtype=str),
+            terms=np.asarray(terms, dtype=str),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            impacts=self.impacts,
+        )
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with np.load(path) as z:
+            terms = z["terms"].tolist()
+            return cls(
+                z["bibcodes"].tolist(),
+                {t: i for i, t in enumerate(terms)},
+                z["offsets"],
+                z["doc_ids"],
+                z["impacts"],
+            )
+
+    def __len__(self):
+        return len(self.bibcodes)
+
+    def score(self, query):
+        """
+        (doc_ids, scores) of docs containing every query term
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or any(t not in self.vocab for t in terms):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        scores = np.zeros(len(self.bibcodes), dtype=np.float32)
+        hits = np.zeros(len(self.bibcodes), dtype=np.int16)
+        for term in terms:
+            t = self.vocab[term]
+            lo, hi = self.offsets[t], self.offsets[t + 1]
+            ids = self.doc_ids[lo:hi]
+            scores[ids] += self.impacts[lo:hi]
+            hits[ids] += 1
+
+        matched = np.flatnonzero(hits == len(terms))
+        return matched, scores[matched]
+
+    def search(self, query, rows, start=0):
+        """
+        Ranked bibcodes for one results page, plus the total hit count
+        """
+        matched, scores = self.score(query)
+        total = len(matched)
+        end = min(start + rows, total)
+        if start >= end:
+            return [], total
+
+        # Only fully sort the prefix we need
+        if end < total:
+            top = np.argpartition(-scores, end - 1)[:end]
+        else:
+            top = np.arange(total)
+        top = top[np.lexsort((matched[top], -scores[top]))][start:end]
+        return [self.bibcodes[i] for i in matched[top]], total
+
+
+class LocalSearch:
+    """
+    Serves fetch_ads-style queries from the harvested corpus
+    """
+
+    def __init__(self, corpus_path=DEFAULT_CORPUS_PATH, index_path=DEFAULT_INDEX_PATH):
+        self.store = CorpusStore(corpus_path)
+        if os.path.exists(index_path):
+            self.index = BM25Index.load(index_path)
+        else:
+            self.index = BM25Index.build(self.store.iter_docs())
+
+    def search(self, query, rows, start=0):
+        """
+        (docs, total) for one results page
+        """
+        bibcodes, total = self.index.search(query, rows, start)
+        return self.store.get_many(bibcodes), total
+
+
+def rebuild_index(corpus_path=DEFAULT_CORPUS_PATH, index_path=DEFAULT_INDEX_PATH):
+    store = CorpusStore(corpus_path)
+    index = BM25Index.build(store.iter_docs())
+    index.save(index_path)
+    return index
+
+
+# =================================================
+# CLI
+# =================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Harvest NASA ADS records into a local search index")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_PATH, help="SQLite corpus path")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="BM25 index path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    h = sub.add_parser("harvest", help="fetch records for seed topics and rebuild the index")
+    h.add_argument("--topic", action="append", help="topic to harvest (repeatable, default: seed topics)")
+    h.add_argument("--since-year", type=int, help="only records from this year on")
+    h.add_argument("--incremental", action="store_true", help="only records entered since the last harvest")
+    h.add_argument("--max-records", type=int, help="cap per topic")
+    h.add_argument("--fixture", help="replay ADS responses from a recorded fixture instead of the API")
+    h.add_argument("--record", help="record ADS responses to this fixture file")
+
+    s = sub.add_parser("search", help="query the local index")
+    s.add_argument("query")
+    s.add_argument("--rows", type=int, default=10)
+
+    sub.add_parser("rebuild", help="rebuild the index from the corpus")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "harvest":
+        session = None
+        if args.fixture:
+            session = RecordedSession(args.fixture)
+        elif args.record:
+            session = RecordingSession(args.record)
+
+        store = CorpusStore(args.corpus)
+        counts = harvest(
+            store,
+            topics=args.topic or SEED_TOPICS,
+            api_key=os.environ.get("NASA_ADS_API_KEY", ""),
+            session=session,
+            since_year=args.since_year,
+            incremental=args.incremental,
+            max_records=args.max_records,
+        )
+        for topic, n in counts.items():
+            print(f"{topic}: {n} records")
+        index = rebuild_index(args.corpus, args.index)
+        print(f"Indexed {len(index)} records into {args.index}")
+
+    elif args.command == "search":
+        local = LocalSearch(args.corpus, args.index)
+        t0 = time.perf_counter()
+        docs, total = local.search(args.query, args.rows)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{total} hits in {ms:.2f} ms")
+        for d in docs:
+            print(f"  {d.get('year', '')}  {doc_to_row(d)['title']}")
+
+    elif args.command == "rebuild":
+        index = rebuild_index(args.corpus, args.index)
+        print(f"Indexed {len(index)} records into {args.index}")
+
+
+if __name__ == "__main__":
+    main()
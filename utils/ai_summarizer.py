@@ -1,44 +1,242 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import streamlit as st  # important!
+from requests.adapters import HTTPAdapter
 
-# Fetch HF key from Streamlit secrets here
-HF_API_KEY = st.secrets.get("HF_API_KEY", "")
+from utils import metrics
+from utils.config import get_setting
+from utils.local_summarizer import LocalBackend, truncate_tokens, DEFAULT_SEQ2SEQ_MODEL
 
-HF_API_URL = "https://router.huggingface.co/hf-inference/models/facebook/bart-large-cnn"
+# Fetch HF key from the environment or Streamlit secrets
+HF_API_KEY = get_setting("HF_API_KEY", "")
 
-def summarize_text(text):
+HF_MODEL = "facebook/bart-large-cnn"
+HF_API_URL = get_setting("HF_API_URL", f"https://router.huggingface.co/hf-inference/models/{HF_MODEL}")
+
+HF_PARAMETERS = {
+    "max_length": 150,
+    "min_length": 60,
+    "do_sample": False
+}
+
+HF_TIMEOUT = 60
+# bart-large-cnn accepts 1024 BPE tokens; word/punct tokens run a bit lower
+HF_MAX_TOKENS = 800
+
+# Batching / concurrency for summarize_many
+HF_BATCH_SIZE = 8
+HF_MAX_WORKERS = 4
+
+# Retry policy for 429 (rate limited) and 503 (model loading)
+HF_RETRY_STATUSES = (429, 503)
+HF_MAX_RETRIES = 5
+HF_BACKOFF_BASE = 1.0
+HF_BACKOFF_MAX = 30.0
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
     """
-    Summarize scientific text using HuggingFace Inference API
+    Shared keep-alive session, so batches reuse pooled connections
     """
-    if not HF_API_KEY:
-        return "❌ HuggingFace API key missing."
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HF_MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Authorization": f"Bearer {HF_API_KEY}",
+                "Content-Type": "application/json"
+            })
+            _session = session
+    return _session
 
-    headers = {
-        "Authorization": f"Bearer {HF_API_KEY}",
-        "Content-Type": "application/json"
-    }
 
+def _retry_delay(response, attempt):
+    """
+    Seconds to wait before retrying a 429/503 response
+    """
+    delay = HF_BACKOFF_BASE * (2 ** attempt)
+
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+
+    # HF reports how long a cold model needs to load
+    try:
+        estimated = response.json().get("estimated_time")
+        if estimated:
+            delay = max(delay, float(estimated))
+    except (ValueError, AttributeError):
+        pass
+
+    return min(delay, HF_BACKOFF_MAX)
+
+
+def _post_inputs(inputs):
+    """
+    POST one request to the inference endpoint, retrying 429/503.
+    Returns (result, error) where exactly one is set.
+    """
     payload = {
-        "inputs": text[:3000],
-        "parameters": {
-            "max_length": 150,
-            "min_length": 60,
-            "do_sample": False
-        }
+        "inputs": inputs,
+        "parameters": HF_PARAMETERS
     }
+    body = json.dumps(payload).encode("utf-8")
+    session = _get_session()
 
-    try:
-        r = requests.post(HF_API_URL, headers=headers, json=payload, timeout=60)
+    for attempt in range(HF_MAX_RETRIES + 1):
+        metrics.inc("hf_bytes_sent_total", len(body))
+        try:
+            with metrics.span("hf_request_seconds"):
+                r = session.post(HF_API_URL, data=body, timeout=HF_TIMEOUT)
+        except Exception as e:
+            metrics.inc("hf_requests_total", status="exception")
+            return None, f"❌ HF Exception: {e}"
+
+        metrics.inc("hf_requests_total", status=r.status_code)
+        metrics.inc("hf_bytes_received_total", len(r.content))
+
+        if r.status_code in HF_RETRY_STATUSES and attempt < HF_MAX_RETRIES:
+            metrics.inc("hf_retries_total", status=r.status_code)
+            time.sleep(_retry_delay(r, attempt))
+            continue
 
         if r.status_code != 200:
-            return f"❌ HF Error {r.status_code}: {r.text}"
+            return None, f"❌ HF Error {r.status_code}: {r.text}"
 
-        result = r.json()
+        try:
+            result = r.json()
+        except ValueError as e:
+            return None, f"❌ HF Exception: {e}"
 
         if isinstance(result, dict) and result.get("error"):
-            return f"❌ HF Model Error: {result['error']}"
+            return None, f"❌ HF Model Error: {result['error']}"
 
-        return result[0]["summary_text"]
+        return result, None
+
+    return None, "❌ HF Error: retries exhausted"
+
+
+def _summarize_batch(batch):
+    """
+    Summarize a list of texts in a single request
+    """
+    result, error = _post_inputs([truncate_tokens(text, HF_MAX_TOKENS) for text in batch])
+    if error:
+        return [error] * len(batch)
+
+    if not isinstance(result, list) or len(result) != len(batch):
+        return ["❌ HF Error: unexpected batch response"] * len(batch)
+
+    summaries = []
+    for item in result:
+        # The pipeline may wrap each output in its own list
+        if isinstance(item, list):
+            item = item[0] if item else {}
+        summaries.append(item.get("summary_text", "❌ HF Error: empty summary"))
+    return summaries
 
-    except Exception as e:
+
+def summarize_text(text):
+    """
+    Summarize scientific text using HuggingFace Inference API
+    """
+    if not HF_API_KEY:
+        return "❌ HuggingFace API key missing."
+
+    result, error = _post_inputs(truncate_tokens(text, HF_MAX_TOKENS))
+    if error:
+        return error
+
+    try:
+        return result[0]["summary_text"]
+    except (KeyError, IndexError, TypeError) as e:
         return f"❌ HF Exception: {e}"
+
+
+def summarize_many(texts, batch_size=HF_BATCH_SIZE, max_workers=HF_MAX_WORKERS):
+    """
+    Summarize many texts in batched, concurrent requests.
+    Results are returned in the same order as the input.
+    """
+    texts = list(texts)
+    if not HF_API_KEY:
+        return ["❌ HuggingFace API key missing."] * len(texts)
+
+    summaries = ["❌ No abstract available."] * len(texts)
+
+    # Only send texts that actually have content
+    pending = [i for i, text in enumerate(texts) if text and text.strip()]
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    if not batches:
+        return summaries
+
+    workers = max(1, min(max_workers, len(batches)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            _summarize_batch,
+            [[texts[i] for i in batch] for batch in batches]
+        )
+        for batch, batch_summaries in zip(batches, results):
+            for i, summary in zip(batch, batch_summaries):
+                summaries[i] = summary
+
+    return summaries
+
+
+# =================================================
+# BACKENDS
+# =================================================
+class HFBackend:
+    """
+    Remote HuggingFace Inference API backend
+    """
+
+    model = HF_MODEL
+    parameters = HF_PARAMETERS
+
+    def summarize(self, text):
+        metrics.inc("summarize_texts_total", backend="hf")
+        with metrics.span("summarize_seconds", backend="hf"):
+            return summarize_text(text)
+
+    def summarize_many(self, texts):
+        texts = list(texts)
+        metrics.inc("summarize_texts_total", len(texts), backend="hf")
+        with metrics.span("summarize_seconds", backend="hf"):
+            return summarize_many(texts)
+
+    def close(self):
+        pass
+
+
+def get_backend(name=None):
+    """
+    Summarizer backend chosen by the SUMMARIZER_BACKEND setting:
+    "hf", "textrank", "seq2seq", or "auto" (hf when a key is set, else textrank)
+    """
+    name = name or get_setting("SUMMARIZER_BACKEND", "auto")
+    if name == "auto":
+        name = "hf" if HF_API_KEY else "textrank"
+
+    if name == "hf":
+        return HFBackend()
+    if name in ("textrank", "seq2seq"):
+        return LocalBackend(
+            kind=name,
+            model_name=get_setting("LOCAL_SUMMARY_MODEL", DEFAULT_SEQ2SEQ_MODEL),
+            workers=int(get_setting("LOCAL_SUMMARY_WORKERS", 1)),
+            max_tokens=int(get_setting("LOCAL_SUMMARY_MAX_TOKENS", 1024)),
+        )
+    raise ValueError(f"Unknown summarizer backend: {name}")
@@ -0,0 +1,293 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ai_summarizer import get_backend
+from utils.config import get_setting
+from utils.summary_store import SummaryStore, content_key, DEFAULT_DB_PATH
+
+# =================================================
+# SETTINGS
+# =================================================
+CHUNK_SIZE = 32
+DEFAULT_WORKERS = 2
+
+
+# =================================================
+# INPUT
+# =================================================
+def _normalize(record):
+    """
+    Accept raw ADS docs (title as a list) or flat rows
+    """
+    title = record.get("title") or ""
+    if isinstance(title, list):
+        title = title[0] if title else ""
+    return {
+        "bibcode": record.get("bibcode", ""),
+        "title": title,
+        "abstract": record.get("abstract") or "",
+    }
+
+
+def iter_file(path):
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield _normalize(row)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield _normalize(json.loads(line))
+
+
+def iter_query(query, api_key, max_records=None):
+    from utils.ads_index import iter_topic_pages
+    for docs in iter_topic_pages(query, api_key=api_key, max_records=max_records):
+        for d in docs:
+            yield _normalize(d)
+
+
+def iter_corpus(path):
+    from utils.ads_index import CorpusStore
+    for d in CorpusStore(path).iter_docs():
+        yield _normalize(d)
+
+
+def iter_chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# =================================================
+# RATE LIMITING & CHECKPOINTS
+# =================================================
+class RateLimiter:
+    """
+    Token bucket: at most `rate` abstracts per second, bursts up to `rate`
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                # Allow a chunk larger than the bucket once it is full
+                if self._tokens >= min(n, self.rate):
+                    self._tokens -= n
+                    return
+                wait = (min(n, self.rate) - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Checkpoint:
+    """
+    Number of input records fully processed, saved atomically after each chunk
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.position = 0
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.position = json.load(f).get("position", 0)
+
+    def save(self, position):
+        self.position = position
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"position": position, "updated": time.time()}, f)
+        os.replace(tmp, self.path)
+
+
+# =================================================
+# RUN
+# =================================================
+class Stats:
+    def __init__(self):
+        self.read = 0
+        self.summarized = 0
+        self.cached = 0
+        self.duplicates = 0
+        self.empty = 0
+        self.failed = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, n in counts.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def report(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        return (
+            f"read {self.read} | summarized {self.summarized} | cached {self.cached} | "
+            f"duplicates {self.duplicates} | empty {self.empty} | failed {self.failed} | "
+            f"{self.summarized / elapsed:.2f} summaries/s, {self.read / elapsed:.2f} records/s "
+            f"over {elapsed:.1f}s"
+        )
+
+
+def run(records, store, backend, checkpoint, workers=DEFAULT_WORKERS, rate=0,
+        chunk_size=CHUNK_SIZE, log=print):
+    """
+    Summarize records into store. Returns Stats.
+    """
+    stats = Stats()
+    limiter = RateLimiter(rate)
+    seen = set()
+    claimed = set()
+    seen_lock = threading.Lock()
+
+    def process(chunk):
+        # Returns how many summaries failed
+        keyed = []
+        for r in chunk:
+            if not r["abstract"].strip():
+                stats.add(empty=1)
+                continue
+            keyed.append((content_key(r["abstract"], backend.model, backend.parameters), r))
+
+        # Same abstract already stored or being summarized in this run,
+        # earlier in this chunk, or in the cache from a previous run
+        with seen_lock:
+            fresh = {}
+            for key, r in keyed:
+                if key in seen or key in claimed or key in fresh:
+                    stats.add(duplicates=1)
+                else:
+                    fresh[key] = r
+            claimed.update(fresh)
+        cached = store.get_many(list(fresh))
+        stats.add(cached=len(cached))
+        todo = [(key, r) for key, r in fresh.items() if key not in cached]
+        done = list(cached)
+
+        failed = 0
+        if todo:
+            limiter.acquire(len(todo))
+            summaries = backend.summarize_many([r["abstract"] for _, r in todo])
+            for (key, _), summary in zip(todo, summaries):
+                if store.put(key, summary, model=backend.model):
+                    stats.add(summarized=1)
+                    done.append(key)
+                else:
+                    failed += 1
+            stats.add(failed=failed)
+
+        # Only stored keys count as done; a failed key is released so a
+        # later copy (or a resumed run, as the checkpoint is held) retries it
+        with seen_lock:
+            seen.update(done)
+            claimed.difference_update(fresh)
+        return failed
+
+    # Skip what a previous run already finished
+    position = checkpoint.position
+    records = iter(records)
+    for _ in range(position):
+        if next(records, None) is None:
+            break
+
+    # Chunks run in parallel but are drained oldest first, so the checkpoint
+    # only ever covers a prefix of chunks stored without failures. After the
+    # first failed chunk it stops moving and a resumed run retries from there.
+    held = False
+
+    def drain(size, future):
+        nonlocal position, held
+        if future.result():
+            held = True
+        if not held:
+            position += size
+            checkpoint.save(position)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = []
+        for chunk in iter_chunks(records, chunk_size):
+            stats.add(read=len(chunk))
+            in_flight.append((len(chunk), pool.submit(process, chunk)))
+
+            # Bound memory: wait for the oldest chunk when the pool is saturated
+            while len(in_flight) >= workers * 2 or (in_flight and in_flight[0][1].done()):
+                drain(*in_flight.pop(0))
+                log(stats.report())
+
+        for size, future in in_flight:
+            drain(size, future)
+
+    if held:
+        log(f"Checkpoint held at {position} records; rerun to retry failed summaries")
+    return stats
+
+
+# =================================================
+# CLI
+# =================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-compute summaries into the BioOrbit summary cache")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL or CSV of ADS records (title, abstract, bibcode)")
+    source.add_argument("--query", help="fetch records for this query from NASA ADS")
+    source.add_argument("--corpus", help="summarize every record in a harvested corpus (ads_corpus.db)")
+
+    parser.add_argument("--max-records", type=int, help="cap for --query")
+    parser.add_argument("--db", default=get_setting("SUMMARY_DB", DEFAULT_DB_PATH), help="summary cache path")
+    parser.add_argument("--backend", help="summarizer backend (default: SUMMARIZER_BACKEND setting)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="chunks summarized in parallel")
+    parser.add_argument("--rate", type=float, default=0, help="max abstracts per second (0 = unlimited)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--checkpoint", help="progress file for resumable runs")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        records = iter_file(args.input)
+    elif args.corpus:
+        records = iter_corpus(args.corpus)
+    else:
+        records = iter_query(args.query, get_setting("NASA_ADS_API_KEY", ""), args.max_records)
+
+    backend = get_backend(args.backend)
+    checkpoint = Checkpoint(args.checkpoint)
+    if checkpoint.position:
+        print(f"Resuming after {checkpoint.position} records")
+
+    try:
+        stats = run(
+            records, SummaryStore(args.db), backend, checkpoint,
+            workers=args.workers, rate=args.rate, chunk_size=args.chunk_size,
+            log=lambda line: print(line, file=sys.stderr),
+        )
+    finally:
+        backend.close()
+
+    print(stats.report())
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
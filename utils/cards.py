@@ -0,0 +1,117 @@
+from functools import lru_cache
+from html import escape
+
+# =================================================
+# BLACK UI
+# =================================================
+APP_CSS = """
+<style>
+body, [data-testid="stAppViewContainer"] {
+    background-color:#000;
+    color:#fff;
+}
+input, textarea {
+    background:#2C2F36;
+    color:white;
+}
+.stButton>button {
+    background:#3A3F47;
+    color:white;
+    border-radius:8px;
+}
+.stButton>button:hover {
+    background:#6BE6C1;
+    color:black;
+}
+.result-card {
+    background:#1A1A1A;
+    padding:15px;
+    border-radius:10px;
+    border-left:4px solid #6BE6C1;
+    margin-bottom:10px;
+}
+.summary-box {
+    background:#222222;
+    padding:12px;
+    border-radius:8px;
+    border-left:4px solid #6BE6C1;
+    margin-bottom:20px;
+    white-space: pre-line;
+}
+.link-button {
+    background:#6BE6C1;
+    color:black;
+    padding:4px 8px;
+    border-radius:6px;
+    text-decoration:none;
+    font-weight:600;
+}
+</style>
+"""
+
+HEADER_HTML = """
+<div style='text-align: center;'>
+    <h1>🧬 BioOrbit</h1>
+    <p style='color: #aaa;'>Explore NASA Space Biology Research</p>
+</div>
+"""
+
+ADS_ABS_URL = "https://ui.adsabs.harvard.edu/abs/"
+
+
+# =================================================
+# CARDS
+# =================================================
+# All text comes from ADS or a model, so everything is escaped here.
+# Cards are memoized: a rerun with the same results reuses the HTML.
+def _safe_url(url):
+    if not url or not url.startswith(("https://", "http://")):
+        return ""
+    return escape(url, quote=True)
+
+
+@lru_cache(maxsize=2048)
+def card_html(title, authors, year, link):
+    href = _safe_url(link)
+    button = f"<a class='link-button' target='_blank' href='{href}'>🔗 View</a>" if href else ""
+    return f"""
+    <div class="result-card">
+        <h4>{escape(title)}</h4>
+        <p style="color:#aaa;"><b>Authors:</b> {escape(authors)}  <b>Year:</b> {escape(str(year))}</p>
+        {button}
+    </div>
+    """
+
+
+def to_bullets(summary_text):
+    # Convert to 4-bullet summary
+    bullets = summary_text.split(". ")
+    bullets = [f"• {escape(b.strip())}" for b in bullets if b][:4]
+    return "<br>".join(bullets)
+
+
+@lru_cache(maxsize=2048)
+def summary_html(summary_text):
+    return f"""
+    <div class="summary-box">
+        <h5> AI Summary</h5>
+        <p>{to_bullets(summary_text)}</p>
+    </div>
+    """
+
+
+def similar_html(items):
+    """
+    items: (bibcode, title, score) tuples
+    """
+    rows = "".join(
+        f"<li><a target='_blank' href='{_safe_url(ADS_ABS_URL + bibcode)}'>{escape(title)}</a> "
+        f"<span style='color:#aaa;'>({score:.2f})</span></li>"
+        for bibcode, title, score in items
+    )
+    return f"""
+    <div class="summary-box">
+        <h5>🔭 Similar papers</h5>
+        <ul>{rows}</ul>
+    </div>
+    """
@@ -0,0 +1,18 @@
+import os
+
+
+def get_setting(name, default=None):
+    """
+    Read a setting from the environment first, then Streamlit secrets.
+    Works outside Streamlit (CLI tools, worker processes).
+    """
+    value = os.environ.get(name)
+    if value is not None:
+        return value
+
+    try:
+        import streamlit as st
+        return st.secrets.get(name, default)
+    except Exception:
+        # No streamlit installed or no secrets.toml
+        return default
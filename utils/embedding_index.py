@@ -0,0 +1,415 @@
+import argparse
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# =================================================
+# SETTINGS
+# =================================================
+DEFAULT_INDEX_DIR = "embedding_index"
+HASHING_DIM = 256
+EMBED_BATCH_SIZE = 256
+INITIAL_CAPACITY = 1024
+
+# IVF (approximate) search; used by default once built and above IVF_MIN_ROWS
+IVF_MIN_ROWS = 20_000
+IVF_NPROBE = 8
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 50_000
+
+# Hybrid search: weight of the embedding score vs BM25
+HYBRID_ALPHA = 0.5
+HYBRID_CANDIDATES = 200
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# =================================================
+# EMBEDDERS
+# =================================================
+class HashingEmbedder:
+    """
+    Dependency-free embedder: hashed unigrams and bigrams, log-tf, L2-normalized.
+    Lexical rather than semantic; use a sentence-transformers model for synonyms.
+    """
+
+    def __init__(self, dim=HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        words = _WORD_RE.findall((text or "").lower())
+        feats = {}
+        for gram in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = zlib.crc32(gram.encode())
+            # Sign bit halves collisions' bias
+            col, sign = h % self.dim, 1.0 if h & 0x80000000 else -1.0
+            feats[col] = feats.get(col, 0.0) + sign
+        return feats
+
+    def embed(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for col, value in self._features(text).items():
+                out[row, col] = np.sign(value) * np.log1p(abs(value))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class SentenceTransformerEmbedder:
+    """
+    Semantic embeddings from a local sentence-transformers model
+    """
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def embed(self, texts):
+        return self.model.encode(
+            list(texts), batch_size=EMBED_BATCH_SIZE, normalize_embeddings=True,
+            convert_to_numpy=True
+        ).astype(np.float32)
+
+
+def get_embedder(name="hashing"):
+    """
+    "hashing", "hashing-<dim>" or a sentence-transformers model name
+    """
+    if name == "hashing":
+        return HashingEmbedder()
+    if name.startswith("hashing-"):
+        return HashingEmbedder(int(name.split("-", 1)[1]))
+    return SentenceTransformerEmbedder(name)
+
+
+def load_index(path=DEFAULT_INDEX_DIR, model="hashing"):
+    """
+    (index, embedder); an existing index keeps the model it was built with
+    """
+    embedder = get_embedder(model)
+    index = EmbeddingIndex(path, dim=embedder.dim, model=embedder.name)
+    if index.model != embedder.name:
+        embedder = get_embedder(index.model)
+    return index, embedder
+
+
+def doc_text(title, abstract):
+    return f"{title}. {abstract or ''}"
+
+
+# =================================================
+# INDEX
+# =================================================
+class EmbeddingIndex:
+    """
+    Unit vectors in a memory-mapped float32 matrix plus an append-only id map.
+
+    Files in the index directory:
+      vectors.npy  (capacity x dim) matrix, rows [0, count) are live
+      ids.jsonl    one [id, title] per row, in row order
+      ivf.npz      optional IVF centroids and row assignments
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_DIR, dim=HASHING_DIM, model="hashing-256"):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._vectors_path = os.path.join(path, "vectors.npy")
+        self._ids_path = os.path.join(path, "ids.jsonl")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._ivf_path = os.path.join(path, "ivf.npz")
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            self.dim, self.model = meta["dim"], meta["model"]
+        else:
+            self.dim, self.model = dim, model
+            with open(self._meta_path, "w") as f:
+                json.dump({"dim": dim, "model": model}, f)
+
+        self.ids, self.titles = [], []
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path) as f:
+                for line in f:
+                    doc_id, title = json.loads(line)
+                    self.ids.append(doc_id)
+                    self.titles.append(title)
+        self.rows = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+        if os.path.exists(self._vectors_path):
+            self.vectors = np.load(self._vectors_path, mmap_mode="r+")
+        else:
+            self.vectors = np.lib.format.open_memmap(
+                self._vectors_path, mode="w+", dtype=np.float32, shape=(INITIAL_CAPACITY, self.dim)
+            )
+
+        self.centroids, self.assign = None, None
+        if os.path.exists(self._ivf_path):
+            with np.load(self._ivf_path) as z:
+                self.centroids = z["centroids"]
+                self.assign = z["assign"][:len(self)]
+            # Rows added after the last IVF save
+            if len(self.assign) < len(self):
+                missing = self._nearest_centroids(self.vectors[len(self.assign):len(self)], 1)[:, 0]
+                self.assign = np.concatenate([self.assign, missing.astype(np.int32)])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.rows
+
+    def _grow(self, needed):
+        capacity = self.vectors.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        tmp = self._vectors_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(capacity, self.dim))
+        grown[:len(self)] = self.vectors[:len(self)]
+        grown.flush()
+        del grown
+        self.vectors._mmap.close()
+        os.replace(tmp, self._vectors_path)
+        self.vectors = np.load(self._vectors_path, mmap_mode="r+")
+
+    def add(self, ids, titles, vectors):
+        """
+        Append vectors for ids not yet indexed. Returns how many were added.
+        """
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self.rows]
+            # Also drop duplicates within this batch
+            keep = list({ids[i]: i for i in keep}.values())
+            if not keep:
+                return 0
+
+            start = len(self)
+            self._grow(start + len(keep))
+            self.vectors[start:start + len(keep)] = np.asarray(vectors, dtype=np.float32)[keep]
+            self.vectors.flush()
+
+            # Vectors first, then ids: rows without an id line are ignored on reload
+            with open(self._ids_path, "a") as f:
+                for i in keep:
+                    f.write(json.dumps([ids[i], titles[i]]) + "\n")
+                    self.rows[ids[i]] = len(self.ids)
+                    self.ids.append(ids[i])
+                    self.titles.append(titles[i])
+
+            if self.centroids is not None:
+                new_assign = self._nearest_centroids(self.vectors[start:len(self)], 1)[:, 0]
+                self.assign = np.concatenate([self.assign, new_assign.astype(np.int32)])
+                self.save_ivf()
+            return len(keep)
+
+    def add_texts(self, embedder, ids, titles, texts, batch_size=EMBED_BATCH_SIZE):
+        """
+        Embed and add in batches, skipping ids already indexed
+        """
+        added = 0
+        todo = [i for i, doc_id in enumerate(ids) if doc_id not in self.rows]
+        for b in range(0, len(todo), batch_size):
+            batch = todo[b:b + batch_size]
+            vecs = embedder.embed([texts[i] for i in batch])
+            added += self.add([ids[i] for i in batch], [titles[i] for i in batch], vecs)
+        return added
+
+    def vector(self, doc_id):
+        return np.array(self.vectors[self.rows[doc_id]])
+
+    # =================================================
+    # SEARCH
+    # =================================================
+    def _nearest_centroids(self, queries, n):
+        scores = queries @ self.centroids.T
+        n = min(n, len(self.centroids))
+        return np.argpartition(-scores, n - 1, axis=1)[:, :n]
+
+    def search_many(self, queries, k=10, approximate=None):
+        """
+        Top-k (ids, scores) per query row by cosine similarity.
+        approximate=None uses IVF when it has been built.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            count = len(self)
+            if count == 0:
+                return [([], np.empty(0, dtype=np.float32)) for _ in queries]
+
+            matrix = self.vectors[:count]
+            if approximate is None:
+                approximate = count >= IVF_MIN_ROWS
+            use_ivf = approximate and self.centroids is not None
+
+            results = []
+            if not use_ivf:
+                # One matmul for the whole batch
+                all_scores = queries @ matrix.T
+                for scores in all_scores:
+                    results.append(self._top_k(np.arange(count), scores, k))
+                return results
+
+            probes = self._nearest_centroids(queries, IVF_NPROBE)
+            for q, probe in zip(queries, probes):
+                rows = np.flatnonzero(np.isin(self.assign[:count], probe))
+                results.append(self._top_k(rows, matrix[rows] @ q, k))
+            return results
+
+    def _top_k(self, rows, scores, k):
+        k = min(k, len(rows))
+        if k == 0:
+            return [], np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self.ids[r] for r in rows[top]], scores[top]
+
+    def search(self, query_vector, k=10, approximate=None):
+        return self.search_many(query_vector[None, :], k, approximate)[0]
+
+    def similar(self, doc_id, k=5):
+        """
+        Papers most similar to an indexed one, excluding itself
+        """
+        if doc_id not in self.rows:
+            return [], np.empty(0, dtype=np.float32)
+        ids, scores = self.search(self.vector(doc_id), k + 1)
+        keep = [i for i, other in enumerate(ids) if other != doc_id][:k]
+        return [ids[i] for i in keep], scores[keep]
+
+    def title(self, doc_id):
+        return self.titles[self.rows[doc_id]]
+
+    # =================================================
+    # IVF
+    # =================================================
+    def build_ivf(self, nlist=None, seed=0):
+        """
+        k-means coarse quantizer; searches then scan only IVF_NPROBE lists
+        """
+        with self._lock:
+            count = len(self)
+            if count == 0:
+                return
+            nlist = nlist or max(1, int(np.sqrt(count)))
+            rng = np.random.default_rng(seed)
+            matrix = self.vectors[:count]
+            sample = matrix[rng.choice(count, min(count, KMEANS_SAMPLE), replace=False)]
+
+            centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)].copy()
+            for _ in range(KMEANS_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(len(centroids)):
+                    members = sample[labels == c]
+                    if len(members):
+                        mean = members.mean(axis=0)
+                        centroids[c] = mean / (np.linalg.norm(mean) or 1.0)
+
+            self.centroids = centroids.astype(np.float32)
+            self.assign = np.concatenate([
+                np.argmax(matrix[i:i + 10_000] @ self.centroids.T, axis=1)
+                for i in range(0, count, 10_000)
+            ]).astype(np.int32)
+            self.save_ivf()
+
+    def save_ivf(self):
+        if self.centroids is not None:
+            np.savez(self._ivf_path, centroids=self.centroids, assign=self.assign)
+
+
+# =================================================
+# HYBRID
+# =================================================
+def _min_max(scores):
+    if not scores:
+        return {}
+    lo, hi = min(scores.values()), max(scores.values())
+    span = (hi - lo) or 1.0
+    return {k: (v - lo) / span for k, v in scores.items()}
+
+
+def hybrid_merge(keyword_scores, vector_scores, alpha=HYBRID_ALPHA):
+    """
+    Blend min-max normalized scores: alpha * vector + (1 - alpha) * keyword.
+    Returns [(id, score)] best first.
+    """
+    keyword_scores, vector_scores = _min_max(keyword_scores), _min_max(vector_scores)
+    merged = {
+        doc_id: alpha * vector_scores.get(doc_id, 0.0) + (1 - alpha) * keyword_scores.get(doc_id, 0.0)
+        for doc_id in set(keyword_scores) | set(vector_scores)
+    }
+    return sorted(merged.items(), key=lambda item: -item[1])
+
+
+def hybrid_search(bm25_index, embedding_index, embedder, query,
+                  candidates=HYBRID_CANDIDATES, alpha=HYBRID_ALPHA):
+    """
+    Ranked bibcodes for a query, merging BM25 and embedding scores
+    """
+    matched, scores = bm25_index.score(query)
+    if len(matched) > candidates:
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        matched, scores = matched[top], scores[top]
+    keyword = {bm25_index.bibcodes[i]: float(s) for i, s in zip(matched, scores)}
+
+    ids, sims = embedding_index.search(embedder.embed([query])[0], candidates)
+    vector = dict(zip(ids, map(float, sims)))
+
+    return [doc_id for doc_id, _ in hybrid_merge(keyword, vector, alpha)]
+
+
+# =================================================
+# CLI
+# =================================================
+def main(argv=None):
+    from utils.ads_index import CorpusStore, DEFAULT_CORPUS_PATH
+
+    parser = argparse.ArgumentParser(description="Build the abstract embedding index")
+    parser.add_argument("--index", default=DEFAULT_INDEX_DIR, help="index directory")
+    parser.add_argument("--model", default="hashing", help="'hashing' or a sentence-transformers model")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="embed every record in the harvested corpus")
+    b.add_argument("--corpus", default=DEFAULT_CORPUS_PATH)
+    b.add_argument("--ivf", action="store_true", help="also build the approximate IVF index")
+
+    s = sub.add_parser("similar", help="papers similar to a bibcode")
+    s.add_argument("bibcode")
+    s.add_argument("-k", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    index, embedder = load_index(args.index, args.model)
+
+    if args.command == "build":
+        store = CorpusStore(args.corpus)
+        ids, titles, texts = [], [], []
+        for d in store.iter_docs():
+            title = (d.get("title") or [""])[0]
+            ids.append(d["bibcode"])
+            titles.append(title)
+            texts.append(doc_text(title, d.get("abstract", "")))
+        added = index.add_texts(embedder, ids, titles, texts)
+        print(f"Embedded {added} new records ({len(index)} total)")
+        if args.ivf or len(index) >= IVF_MIN_ROWS:
+            index.build_ivf()
+            print(f"Built IVF with {len(index.centroids)} lists")
+
+    elif args.command == "similar":
+        ids, scores = index.similar(args.bibcode, args.k)
+        for doc_id, score in zip(ids, scores):
+            print(f"  {score:.3f}  {index.title(doc_id)}")
+
+
+if __name__ == "__main__":
+    main()
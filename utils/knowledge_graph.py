@@ -0,0 +1,361 @@
+import gzip
+import heapq
+import html
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import networkx as nx
+
+# =================================================
+# SETTINGS
+# =================================================
+DEFAULT_GRAPH_PATH = "knowledge_graph.json.gz"
+
+# Persist after this many new papers or this many seconds, whichever comes first
+SAVE_EVERY_PAPERS = 50
+SAVE_EVERY_SECONDS = 60
+
+# Only the leading authors of a paper get pairwise coauthor edges; large
+# collaborations list thousands of authors and a full clique is quadratic
+MAX_COAUTHORS = 15
+
+# Caps on nodes and edges sent to the browser
+MAX_RENDER_NODES = 250
+MAX_RENDER_EDGES = 600
+
+NODE_COLORS = {
+    "paper": "#6BE6C1",
+    "author": "#8AB4F8",
+    "organism": "#F6C177",
+    "condition": "#EB6F92",
+    "keyword": "#C4A7E7",
+}
+
+# Canonical concept -> patterns matched in title + abstract
+ORGANISMS = {
+    "arabidopsis": [r"arabidopsis"],
+    "mouse": [r"mice", r"mouse", r"murine"],
+    "rat": [r"rats?"],
+    "human": [r"humans?", r"astronauts?", r"crew ?members?"],
+    "c. elegans": [r"c\. ?elegans", r"caenorhabditis"],
+    "drosophila": [r"drosophila", r"fruit fl(y|ies)"],
+    "e. coli": [r"e\. ?coli", r"escherichia"],
+    "yeast": [r"yeast", r"saccharomyces"],
+    "zebrafish": [r"zebrafish"],
+    "tardigrade": [r"tardigrades?"],
+    "bacillus": [r"bacillus"],
+}
+CONDITIONS = {
+    "microgravity": [r"microgravity", r"weightlessness"],
+    "simulated microgravity": [r"simulated microgravity", r"clinostat", r"random positioning machine"],
+    "spaceflight": [r"space ?flight", r"international space station", r"\biss\b"],
+    "radiation": [r"radiation", r"irradiat\w*", r"cosmic rays?", r"heavy ions?"],
+    "hypergravity": [r"hypergravity", r"centrifug\w*"],
+    "hindlimb unloading": [r"hindlimb (unloading|suspension)"],
+    "isolation": [r"isolation", r"confinement"],
+}
+KEYWORDS = {
+    "bone loss": [r"bone loss", r"osteopenia", r"osteoclast\w*"],
+    "muscle atrophy": [r"muscle atrophy", r"muscle wasting", r"sarcopenia"],
+    "gravitropism": [r"gravitropi\w*", r"gravisensing"],
+    "gene expression": [r"gene expression", r"transcriptom\w*"],
+    "oxidative stress": [r"oxidative stress", r"reactive oxygen species", r"\bros\b"],
+    "immune response": [r"immun\w*"],
+    "stem cells": [r"stem cells?"],
+    "dna damage": [r"dna damage", r"double[- ]strand breaks?"],
+    "cardiovascular": [r"cardiovascular", r"cardiac"],
+    "microbiome": [r"microbiome", r"microbiota"],
+}
+
+
+def _compile(vocab):
+    return {
+        concept: re.compile(r"\b(?:" + "|".join(patterns) + r")\b", re.IGNORECASE)
+        for concept, patterns in vocab.items()
+    }
+
+
+_CONCEPTS = {
+    "organism": _compile(ORGANISMS),
+    "condition": _compile(CONDITIONS),
+    "keyword": _compile(KEYWORDS),
+}
+
+
+def extract_concepts(text):
+    """
+    List of (kind, concept) found in text
+    """
+    found = []
+    for kind, patterns in _CONCEPTS.items():
+        for concept, pattern in patterns.items():
+            if pattern.search(text):
+                found.append((kind, concept))
+    return found
+
+
+# =================================================
+# GRAPH
+# =================================================
+class KnowledgeGraph:
+    """
+    Papers, authors and concepts from ADS records.
+
+    Edges: paper-author (authored), paper-concept (mentions) and
+    author-author (coauthor, weighted by shared papers, among the first
+    MAX_COAUTHORS authors only). Papers sharing a concept are linked
+    through the concept node rather than pairwise, so each paper adds a
+    bounded number of edges beyond its paper-author edges.
+    """
+
+    def __init__(self, path=DEFAULT_GRAPH_PATH):
+        self.path = path
+        self.graph = nx.Graph()
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self._last_save = time.time()
+        # Snapshot numbers; an older background save never overwrites a newer one
+        self._snapshots = 0
+        self._written = 0
+        # Bumped whenever papers are added; lets callers memoize renders
+        self.version = 0
+
+    @staticmethod
+    def paper_id(bibcode):
+        return f"paper:{bibcode}"
+
+    def __contains__(self, node):
+        return node in self.graph
+
+    def __len__(self):
+        return self.graph.number_of_nodes()
+
+    def _add_node(self, node, kind, label):
+        if node not in self.graph:
+            self.graph.add_node(node, kind=kind, label=label)
+
+    def _add_edge(self, u, v, kind):
+        if self.graph.has_edge(u, v):
+            self.graph[u][v]["weight"] += 1
+        else:
+            self.graph.add_edge(u, v, kind=kind, weight=1)
+
+    def add_records(self, docs):
+        """
+        Add raw ADS docs not already in the graph. Returns how many were new.
+        """
+        added = 0
+        with self._lock:
+            for d in docs:
+                bibcode = d.get("bibcode")
+                if not bibcode:
+                    continue
+                paper = self.paper_id(bibcode)
+                if paper in self.graph:
+                    continue
+
+                title = (d.get("title") or [""])[0]
+                self._add_node(paper, "paper", title)
+
+                authors = [f"author:{a}" for a in dict.fromkeys(d.get("author") or [])]
+                for i, author in enumerate(authors):
+                    self._add_node(author, "author", author.split(":", 1)[1])
+                    self._add_edge(paper, author, "authored")
+                    if i < MAX_COAUTHORS:
+                        for other in authors[:i]:
+                            self._add_edge(author, other, "coauthor")
+
+                for kind, concept in extract_concepts(f"{title} {d.get('abstract', '')}"):
+                    node = f"{kind}:{concept}"
+                    self._add_node(node, kind, concept)
+                    self._add_edge(paper, node, "mentions")
+
+                added += 1
+
+            if added:
+                self.version += 1
+            self._unsaved += added
+            autosave = self._unsaved and (
+                self._unsaved >= SAVE_EVERY_PAPERS
+                or time.time() - self._last_save >= SAVE_EVERY_SECONDS
+            )
+            if autosave:
+                # Claim the pending changes so concurrent calls don't save twice
+                self._unsaved = 0
+                self._last_save = time.time()
+
+        if autosave:
+            threading.Thread(target=self.save, daemon=True).start()
+        return added
+
+    def _bfs(self, center, k, max_nodes):
+        # node -> BFS parent (None for center); caller holds the lock
+        parents = {center: None}
+        depth = {center: 0}
+        frontier = deque([center])
+        while frontier and len(parents) < max_nodes:
+            node = frontier.popleft()
+            if depth[node] >= k:
+                continue
+            # Visit heavier edges first so the cap keeps the strongest links;
+            # nlargest avoids sorting every neighbor of a hub node
+            nbrs = heapq.nlargest(
+                max_nodes - len(parents),
+                ((nbr, attrs) for nbr, attrs in self.graph[node].items() if nbr not in parents),
+                key=lambda item: item[1].get("weight", 1),
+            )
+            for nbr, _ in nbrs:
+                parents[nbr] = node
+                depth[nbr] = depth[node] + 1
+                frontier.append(nbr)
+        return parents
+
+    def neighborhood(self, center, k=1, max_nodes=MAX_RENDER_NODES):
+        """
+        Nodes within k hops of center (BFS order, at most max_nodes)
+        """
+        with self._lock:
+            if center not in self.graph:
+                return []
+            return list(self._bfs(center, k, max_nodes))
+
+    def subgraph(self, center, k=1, max_nodes=MAX_RENDER_NODES):
+        with self._lock:
+            return self.graph.subgraph(self.neighborhood(center, k, max_nodes)).copy()
+
+    def view(self, center, k=1, max_nodes=MAX_RENDER_NODES, max_edges=MAX_RENDER_EDGES):
+        """
+        (nodes, edges) to draw: nodes as (id, attrs), edges as (u, v, attrs).
+        BFS tree edges are always kept so the view stays connected; the
+        rest are filled in heaviest first up to max_edges.
+        """
+        with self._lock:
+            if center not in self.graph:
+                return [], []
+            parents = self._bfs(center, k, max_nodes)
+            tree = [(parent, node) for node, parent in parents.items() if parent is not None]
+            in_tree = {frozenset(e) for e in tree}
+
+            extra = (
+                (u, v, attrs)
+                for u in parents
+                for v, attrs in self.graph[u].items()
+                if v in parents and u < v and frozenset((u, v)) not in in_tree
+            )
+            edges = [(u, v, self.graph[u][v]) for u, v in tree]
+            edges += heapq.nlargest(
+                max(0, max_edges - len(edges)), extra, key=lambda e: e[2].get("weight", 1)
+            )
+            nodes = [(node, dict(self.graph.nodes[node])) for node in parents]
+            return nodes, [(u, v, dict(attrs)) for u, v, attrs in edges]
+
+    # =================================================
+    # PERSISTENCE
+    # =================================================
+    def save(self, path=None):
+        """
+        Gzipped JSON with a node table and integer-indexed edges
+        """
+        path = path or self.path
+        # Snapshot under the lock, compress and write outside it
+        with self._lock:
+            index = {node: i for i, node in enumerate(self.graph.nodes)}
+            data = {
+                "nodes": [
+                    [node, attrs["kind"], attrs["label"]]
+                    for node, attrs in self.graph.nodes(data=True)
+                ],
+                "edges": [
+                    [index[u], index[v], attrs["kind"], attrs["weight"]]
+                    for u, v, attrs in self.graph.edges(data=True)
+                ],
+            }
+            self._unsaved = 0
+            self._last_save = time.time()
+            self._snapshots += 1
+            snapshot = self._snapshots
+
+        with self._save_lock:
+            if snapshot < self._written:
+                return
+            tmp = f"{path}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=5) as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, path)
+            self._written = snapshot
+
+    def flush(self):
+        """
+        Save now if papers were added since the last save (e.g. at exit)
+        """
+        with self._lock:
+            pending = self._unsaved
+        if pending:
+            self.save()
+
+    @classmethod
+    def load(cls, path=DEFAULT_GRAPH_PATH):
+        kg = cls(path)
+        if not os.path.exists(path):
+            return kg
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+
+        nodes = data["nodes"]
+        kg.graph.add_nodes_from((node, {"kind": kind, "label": label}) for node, kind, label in nodes)
+        kg.graph.add_edges_from(
+            (nodes[u][0], nodes[v][0], {"kind": kind, "weight": weight})
+            for u, v, kind, weight in data["edges"]
+        )
+        return kg
+
+    # =================================================
+    # RENDERING
+    # =================================================
+    def render_html(self, center, k=1, max_nodes=MAX_RENDER_NODES, max_edges=MAX_RENDER_EDGES,
+                    height="600px", cdn_resources="remote"):
+        """
+        pyvis HTML for the k-hop neighborhood of center. cdn_resources="remote"
+        loads vis-network from a pinned CDN the browser caches; "in_line"
+        embeds it (~700 KB) for offline use.
+        """
+        from pyvis.network import Network
+
+        nodes, edges = self.view(center, k, max_nodes, max_edges)
+        net = Network(height=height, width="100%", bgcolor="#000000", font_color="#ffffff",
+                      cdn_resources=cdn_resources)
+
+        degree = {}
+        for u, v, _ in edges:
+            degree[u] = degree.get(u, 0) + 1
+            degree[v] = degree.get(v, 0) + 1
+
+        # Fill pyvis' lists directly; Network.add_edge rescans every edge per call
+        for node, attrs in nodes:
+            label = attrs["label"]
+            options = {
+                "id": node,
+                "label": label if len(label) <= 40 else label[:37] + "...",
+                # Labels come from ADS records; tooltips are rendered as HTML
+                "title": html.escape(label),
+                "color": NODE_COLORS.get(attrs["kind"], "#aaaaaa"),
+                "size": 25 if node == center else 10 + min(degree.get(node, 0), 15),
+                "shape": net.shape,
+                "font": {"color": net.font_color},
+            }
+            net.nodes.append(options)
+            net.node_ids.append(node)
+            net.node_map[node] = options
+        net.edges = [
+            {"from": u, "to": v, "value": attrs["weight"], "title": attrs["kind"]}
+            for u, v, attrs in edges
+        ]
+
+        net.barnes_hut()
+        return net.generate_html()
@@ -0,0 +1,239 @@
+import math
+import multiprocessing
+import queue
+import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+
+from utils import metrics
+
+# =================================================
+# SETTINGS
+# =================================================
+TEXTRANK_SENTENCES = 4
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+
+DEFAULT_SEQ2SEQ_MODEL = "sshleifer/distilbart-cnn-12-6"
+DEFAULT_MAX_TOKENS = 1024
+
+# Dynamic batching: flush when a batch is full or the oldest request waited this long
+MAX_BATCH_SIZE = 16
+MAX_BATCH_WAIT = 0.02
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "was", "were", "we", "with",
+}
+
+
+# =================================================
+# TEXT HELPERS
+# =================================================
+def truncate_tokens(text, max_tokens, tokenizer=None):
+    """
+    Cut text after max_tokens tokens. Uses the model tokenizer when given,
+    otherwise a word/punctuation split that keeps the original spacing.
+    """
+    text = text or ""
+    if tokenizer is not None:
+        ids = tokenizer(text, truncation=True, max_length=max_tokens)["input_ids"]
+        return tokenizer.decode(ids, skip_special_tokens=True)
+
+    for i, match in enumerate(_TOKEN_RE.finditer(text)):
+        if i == max_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_RE.split(text or "") if s.strip()]
+
+
+# =================================================
+# TEXTRANK
+# =================================================
+def textrank(text, sentences=TEXTRANK_SENTENCES):
+    """
+    Extractive summary: the highest-ranked sentences, in original order
+    """
+    parts = split_sentences(text)
+    if len(parts) <= sentences:
+        return " ".join(parts)
+
+    words = [
+        {w for w in _WORD_RE.findall(s.lower()) if w not in _STOPWORDS}
+        for s in parts
+    ]
+
+    # Similarity from the original TextRank paper: overlap / (log|a| + log|b|)
+    n = len(parts)
+    sim = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            overlap = len(words[i] & words[j])
+            if overlap and len(words[i]) > 1 and len(words[j]) > 1:
+                sim[i, j] = sim[j, i] = overlap / (math.log(len(words[i])) + math.log(len(words[j])))
+
+    out_weight = sim.sum(axis=1)
+    out_weight[out_weight == 0] = 1.0
+    transition = sim / out_weight[:, None]
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(TEXTRANK_ITERATIONS):
+        new = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * transition.T @ scores
+        if np.abs(new - scores).sum() < 1e-6:
+            scores = new
+            break
+        scores = new
+
+    top = sorted(np.argsort(-scores, kind="stable")[:sentences])
+    return " ".join(parts[i] for i in top)
+
+
+# =================================================
+# WORKER PROCESSES
+# =================================================
+# Loaded once per worker process by _init_worker
+_worker = {}
+
+
+def _init_worker(kind, model_name, max_tokens):
+    _worker["kind"] = kind
+    _worker["max_tokens"] = max_tokens
+    _worker["tokenizer"] = None
+    if kind == "seq2seq":
+        from transformers import AutoTokenizer, pipeline
+        _worker["tokenizer"] = AutoTokenizer.from_pretrained(model_name)
+        _worker["pipeline"] = pipeline(
+            "summarization", model=model_name, tokenizer=_worker["tokenizer"], device=-1
+        )
+
+
+def _summarize_batch(texts):
+    max_tokens = _worker["max_tokens"]
+    texts = [truncate_tokens(t, max_tokens, _worker["tokenizer"]) for t in texts]
+
+    if _worker["kind"] == "seq2seq":
+        outputs = _worker["pipeline"](
+            texts, max_length=150, min_length=60, do_sample=False, truncation=True
+        )
+        return [o["summary_text"] for o in outputs]
+    return [textrank(t) for t in texts]
+
+
+class DynamicBatcher:
+    """
+    Collects single requests into batches for the worker pool.
+    A batch is sent when it is full or its first request has waited MAX_BATCH_WAIT.
+    """
+
+    def __init__(self, run_batch, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.max_batch_size:
+                    batch.append(self._queue.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        texts = [text for text, _ in batch]
+        futures = [future for _, future in batch]
+
+        def done(result_future):
+            try:
+                results = result_future.result()
+            except Exception as e:
+                results = [f"❌ Local summarizer error: {e}"] * len(futures)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+        try:
+            self.run_batch(texts).add_done_callback(done)
+        except Exception as e:
+            # e.g. the pool is shut down or broken
+            for future in futures:
+                future.set_result(f"❌ Local summarizer error: {e}")
+
+
+# =================================================
+# BACKEND
+# =================================================
+class LocalBackend:
+    """
+    In-process CPU summarizer: TextRank, or a local seq2seq model.
+    Inference runs in a process pool with the model loaded once per worker.
+    workers=0 runs in the calling process.
+    """
+
+    def __init__(self, kind="textrank", model_name=DEFAULT_SEQ2SEQ_MODEL,
+                 workers=1, max_tokens=DEFAULT_MAX_TOKENS):
+        if kind not in ("textrank", "seq2seq"):
+            raise ValueError(f"Unknown local summarizer: {kind}")
+
+        self.kind = kind
+        self.model = "textrank" if kind == "textrank" else model_name
+        self.parameters = {"max_tokens": max_tokens}
+        if kind == "textrank":
+            self.parameters["sentences"] = TEXTRANK_SENTENCES
+        else:
+            self.parameters.update({"max_length": 150, "min_length": 60, "do_sample": False})
+
+        initargs = (kind, model_name, max_tokens)
+        if workers > 0:
+            # spawn: forking a threaded Streamlit server is not safe
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=initargs,
+            )
+            self._batcher = DynamicBatcher(lambda texts: self._pool.submit(_summarize_batch, texts))
+        else:
+            _init_worker(*initargs)
+            self._pool = None
+            self._batcher = None
+
+    def summarize(self, text):
+        return self.summarize_many([text])[0]
+
+    def summarize_many(self, texts):
+        texts = list(texts)
+        summaries = ["❌ No abstract available."] * len(texts)
+        pending = [i for i, text in enumerate(texts) if text and text.strip()]
+
+        metrics.inc("summarize_texts_total", len(pending), backend=self.kind)
+        with metrics.span("summarize_seconds", backend=self.kind):
+            if self._batcher is None:
+                results = _summarize_batch([texts[i] for i in pending])
+            else:
+                futures = [self._batcher.submit(texts[i]) for i in pending]
+                results = [f.result() for f in futures]
+
+        for i, summary in zip(pending, results):
+            summaries[i] = summary
+        return summaries
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
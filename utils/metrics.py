@@ -0,0 +1,236 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =================================================
+# SETTINGS
+# =================================================
+PREFIX = "bioorbit_"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_HELP = {
+    "ads_requests_total": "ADS chunk fetches by source",
+    "ads_errors_total": "Failed ADS requests",
+    "ads_bytes_total": "Bytes received from ADS",
+    "ads_seconds": "ADS fetch latency",
+    "cursor_windows_total": "Result windows served by the cursor",
+    "summary_cache_hits_total": "Summary cache lookups that found an entry",
+    "summary_cache_misses_total": "Summary cache lookups that found nothing",
+    "summary_cache_lookup_seconds": "Summary cache batch lookup latency",
+    "summary_cache_open_seconds": "Summary cache open and migration time",
+    "render_cards_seconds": "Result card rendering time per chunk",
+    "hf_requests_total": "HuggingFace inference requests by status",
+    "hf_retries_total": "HuggingFace requests retried after 429/503",
+    "hf_bytes_sent_total": "Bytes sent to HuggingFace",
+    "hf_bytes_received_total": "Bytes received from HuggingFace",
+    "hf_request_seconds": "HuggingFace HTTP request latency",
+    "summarize_seconds": "Summarizer call latency by backend",
+    "summarize_texts_total": "Abstracts sent to a summarizer backend",
+}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Upper bucket bound holding the q-th observation
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+# =================================================
+# REGISTRY
+# =================================================
+class Registry:
+    """
+    Process-wide counters and latency histograms
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = _Histogram(buckets)
+            hist.observe(value)
+
+    def counter(self, name, **labels):
+        return self.counters.get((name, _label_key(labels)), 0)
+
+    def total(self, name):
+        return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """
+        Rows for the debug panel: metric, labels, count/value, mean, p50, p99
+        """
+        with self._lock:
+            rows = [
+                {"metric": name, "labels": _format_labels(key), "value": value}
+                for (name, key), value in sorted(self.counters.items())
+            ]
+            for (name, key), hist in sorted(self.histograms.items()):
+                rows.append({
+                    "metric": name,
+                    "labels": _format_labels(key),
+                    "value": hist.count,
+                    "mean_ms": round(1000 * hist.sum / hist.count, 2) if hist.count else 0.0,
+                    "p50_ms": 1000 * hist.quantile(0.5),
+                    "p99_ms": 1000 * hist.quantile(0.99),
+                })
+        return rows
+
+    def render_prometheus(self):
+        """
+        Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            counters, histograms = {}, {}
+            for (name, key), value in self.counters.items():
+                counters.setdefault(name, []).append((key, value))
+            for (name, key), hist in self.histograms.items():
+                histograms.setdefault(name, []).append((key, hist))
+
+            for name in sorted(counters):
+                full = PREFIX + name
+                lines.append(f"# HELP {full} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(counters[name]):
+                    lines.append(f"{full}{_format_labels(key)} {value}")
+
+            for name in sorted(histograms):
+                full = PREFIX + name
+                lines.append(f"# HELP {full} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(histograms[name], key=lambda item: item[0]):
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f"{full}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{full}_bucket{_format_labels(key, [('le', '+Inf')])} {hist.count}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {hist.sum}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def inc(name, value=1, **labels):
+    REGISTRY.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    REGISTRY.observe(name, value, **labels)
+
+
+@contextmanager
+def span(name, **labels):
+    """
+    Time a block into the `name` histogram
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - start, **labels)
+
+
+def timed(name, **labels):
+    """
+    Decorator form of span
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_hit_ratio():
+    hits = REGISTRY.total("summary_cache_hits_total")
+    misses = REGISTRY.total("summary_cache_misses_total")
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def render_prometheus():
+    return REGISTRY.render_prometheus()
+
+
+# =================================================
+# /metrics ENDPOINT
+# =================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """
+    Serve /metrics for Prometheus scraping from a daemon thread
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,294 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils import metrics
+
+# =================================================
+# SETTINGS
+# =================================================
+DEFAULT_DB_PATH = "summary_cache.db"
+DEFAULT_TTL = 30 * 24 * 3600      # 30 days
+DEFAULT_MAX_ENTRIES = 50_000
+
+# Run eviction after this many writes instead of on every put
+EVICT_EVERY = 100
+
+# Responses that are not summaries of the abstract
+POISON_PATTERNS = [
+    r"don'?t see a scientific paper",
+    r"didn'?t provide the (content|paper|text)",
+    r"don'?t have the (full )?paper",
+    r"content of the paper is not provided",
+    r"please (share|provide) the (paper|title|abstract)",
+    r"^insufficient text for summarization",
+    r"^analyze this nasa",
+    r"^❌",
+]
+_POISON_RE = re.compile("|".join(POISON_PATTERNS), re.IGNORECASE)
+
+_MD5_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+# =================================================
+# KEYS
+# =================================================
+def content_key(text, model, parameters):
+    """
+    Stable key for a summary: hash of the normalized abstract,
+    the model id and the generation parameters
+    """
+    payload = json.dumps({
+        "text": " ".join((text or "").split()),
+        "model": model,
+        "parameters": parameters,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def legacy_key(title):
+    """
+    Key for entries migrated from summary_cache.json, which only knew the title
+    """
+    if _MD5_RE.match(title):
+        return f"title:{title}"
+    return f"title:{hashlib.md5(title.encode()).hexdigest()}"
+
+
+def is_poisoned(summary):
+    """
+    True for empty summaries, error strings and model refusals
+    """
+    if not summary:
+        return True
+    text = summary.replace("<br>", "\n").replace("•", "").strip()
+    return not text or bool(_POISON_RE.search(text))
+
+
+# =================================================
+# STORE
+# =================================================
+class SummaryStore:
+    """
+    SQLite (WAL) summary cache with TTL and LRU eviction.
+    Safe to share between threads, sessions and processes.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                model TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries(accessed_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+
+    def _conn(self):
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _expired(self, created_at, now):
+        return self.ttl is not None and created_at < now - self.ttl
+
+    def get(self, key, count=True):
+        """
+        Summary for key, or None if missing, expired or poisoned
+        """
+        return self.get_many([key], count).get(key)
+
+    def get_many(self, keys, count=True):
+        """
+        Dict of key -> summary for the keys that are cached.
+        count=False skips the hit/miss counters, for fallback and
+        re-check lookups of keys already counted once.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        with metrics.span("summary_cache_lookup_seconds"):
+            found = self._get_many(keys)
+        if not count:
+            return found
+        metrics.inc("summary_cache_hits_total", len(found))
+        metrics.inc("summary_cache_misses_total", len(keys) - len(found))
+        return found
+
+    def _get_many(self, keys):
+        conn = self._conn()
+        now = time.time()
+        found, stale = {}, []
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, summary, created_at FROM summaries WHERE key IN ({marks})", chunk
+            ).fetchall()
+            for key, summary, created_at in rows:
+                if self._expired(created_at, now) or is_poisoned(summary):
+                    stale.append(key)
+                else:
+                    found[key] = summary
+
+        if stale:
+            conn.executemany("DELETE FROM summaries WHERE key = ?", [(k,) for k in stale])
+        if found:
+            conn.executemany(
+                "UPDATE summaries SET accessed_at = ? WHERE key = ?",
+                [(now, k) for k in found]
+            )
+        return found
+
+    def put(self, key, summary, model=None):
+        """
+        Store a summary. Poisoned summaries are rejected; returns True if stored.
+        """
+        if is_poisoned(summary):
+            return False
+
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO summaries (key, summary, model, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, summary, model, now, now)
+        )
+
+        with self._writes_lock:
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+        return True
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM summaries WHERE key = ?", (key,))
+
+    def evict(self):
+        """
+        Drop expired entries, then the least recently used ones above max_entries.
+        Returns the number of rows removed.
+        """
+        conn = self._conn()
+        removed = 0
+        if self.ttl is not None:
+            removed += conn.execute(
+                "DELETE FROM summaries WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+        if self.max_entries is not None:
+            removed += conn.execute(
+                "DELETE FROM summaries WHERE key IN ("
+                "SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        return removed
+
+    def purge_poisoned(self):
+        """
+        Scan the whole store and delete poisoned entries
+        """
+        conn = self._conn()
+        bad = [
+            (key,) for key, summary in conn.execute("SELECT key, summary FROM summaries")
+            if is_poisoned(summary)
+        ]
+        conn.executemany("DELETE FROM summaries WHERE key = ?", bad)
+        return len(bad)
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def get_meta(self, name, default=None):
+        row = self._conn().execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, name, value):
+        self._conn().execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    # =================================================
+    # MIGRATION
+    # =================================================
+    def migrate_json(self, json_path, force=False):
+        """
+        One-shot import of the old summary_cache.json (title or md5(title) -> summary).
+        Returns (imported, dropped); does nothing if already migrated.
+        """
+        marker = f"migrated:{os.path.abspath(json_path)}"
+        if not force and self.get_meta(marker):
+            return 0, 0
+        if not os.path.exists(json_path):
+            return 0, 0
+
+        with open(json_path, "r") as f:
+            legacy = json.load(f)
+
+        imported = dropped = 0
+        for title, summary in legacy.items():
+            # Old app stored "• a<br>• b" bullets; keep plain text
+            if "<br>" in summary:
+                parts = [p.replace("•", "", 1).strip() for p in summary.split("<br>")]
+                summary = ". ".join(p.rstrip(".") for p in parts if p) + "."
+            if self.put(legacy_key(title), summary, model="legacy"):
+                imported += 1
+            else:
+                dropped += 1
+
+        self.set_meta(marker, str(time.time()))
+        return imported, dropped
+
+
+# =================================================
+# CLI
+# =================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BioOrbit summary cache tools")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite cache path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="import a legacy summary_cache.json")
+    migrate.add_argument("json_path")
+    migrate.add_argument("--force", action="store_true", help="re-import even if already migrated")
+
+    sub.add_parser("purge", help="drop poisoned and expired entries")
+    sub.add_parser("stats", help="print entry count")
+
+    args = parser.parse_args(argv)
+    store = SummaryStore(args.db)
+
+    if args.command == "migrate":
+        imported, dropped = store.migrate_json(args.json_path, force=args.force)
+        print(f"Imported {imported} summaries, dropped {dropped} poisoned entries")
+    elif args.command == "purge":
+        poisoned = store.purge_poisoned()
+        evicted = store.evict()
+        print(f"Removed {poisoned} poisoned and {evicted} expired/overflow entries")
+    elif args.command == "stats":
+        print(f"{len(store)} summaries in {args.db}")
+
+
+if __name__ == "__main__":
+    main()